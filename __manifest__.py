@@ -1,6 +1,6 @@
 {
     'name': 'Knowledge Shelfs Hive',
-    'version': '18.0.1.0.0',
+    'version': '18.0.1.2.0',
     'category': 'Library',
     'summary':'Complete Library Management System',
     'description': """
@@ -20,6 +20,7 @@
     'website': 'https://solid-portfolio-bice.vercel.app',
     'depends': [
         'base',
+        'bus',
         'mail',
         'portal',
         'website',
@@ -41,18 +42,23 @@
         # Views
         'views/library_config_views.xml',
         'views/library_category_views.xml',
+        'views/library_location_views.xml',
         'views/library_author_views.xml',
         'views/library_publisher_views.xml',
         'views/library_book_views.xml',
+        'views/library_book_copy_views.xml',
         'views/library_member_views.xml',
         'views/library_borrowing_views.xml',
         'views/library_fine_views.xml',
         'views/library_reservation_views.xml',
         'views/library_review_views.xml',
+        'views/library_fine_statement_views.xml',
+        'views/library_circulation_daily_views.xml',
         'views/library_dashboard_views.xml',
         'views/library_actions.xml',
         'views/library_menu.xml',
         'views/portal_templates.xml',
+        'views/portal_book_templates.xml',
         
         # Wizards
         'wizard/book_import_wizard_views.xml',
@@ -1,5 +1,7 @@
 from odoo import http
 from odoo.http import request
+from odoo.exceptions import ValidationError
+from ..tools.search_normalize import search_key
 import json
 import logging
 
@@ -44,18 +46,14 @@ class LibraryAPIController(http.Controller):
             search = kw.get('search', '')
             category_id = kw.get('category_id')
             author_id = kw.get('author_id')
+            language = kw.get('language')
+            publisher_id = kw.get('publisher_id')
             available_only = kw.get('available_only', '').lower() == 'true'
+            with_facets = kw.get('facets', '').lower() == 'true'
             
             # Build domain
-            domain = []
-            if search:
-                domain.append(['name', 'ilike', search])
-            if category_id:
-                domain.append(['category_id', '=', int(category_id)])
-            if author_id:
-                domain.append(['author_ids', 'in', [int(author_id)]])
-            if available_only:
-                domain.extend([['available_copies', '>', 0], ['state', '=', 'available']])
+            domain = request.env['library.book']._catalog_domain(
+                search, category_id, author_id, available_only, language, publisher_id)
             
             # Get books
             books = request.env['library.book'].search(domain, limit=limit, offset=offset)
@@ -78,7 +76,7 @@ class LibraryAPIController(http.Controller):
                     'location': book.location,
                 })
             
-            return self._json_response({
+            response = {
                 'success': True,
                 'data': books_data,
                 'pagination': {
@@ -87,7 +85,10 @@ class LibraryAPIController(http.Controller):
                     'offset': offset,
                     'has_next': (offset + limit) < total_count
                 }
-            })
+            }
+            if with_facets:
+                response['facets'] = request.env['library.book']._get_facets(domain)
+            return self._json_response(response)
             
         except Exception as e:
             _logger.error("API Books List Error: %s", str(e))
@@ -153,6 +154,42 @@ class LibraryAPIController(http.Controller):
             _logger.error("API Book Detail Error: %s", str(e))
             return self._json_response({'error': 'Internal server error', 'code': 500}, 500)
     
+    @http.route('/api/books/<int:book_id>/recommendations', type='http', auth='user', methods=['GET'], csrf=False)
+    def api_book_recommendations(self, book_id, **kw):
+        """Get the books recommended alongside a specific book"""
+        access_check = self._check_api_access()
+        if access_check:
+            return self._json_response(access_check, 403)
+        
+        try:
+            book = request.env['library.book'].browse(book_id)
+            if not book.exists():
+                return self._json_response({'error': 'Book not found', 'code': 404}, 404)
+            
+            try:
+                limit = min(max(int(kw.get('limit', 6)), 1), 50)
+            except (TypeError, ValueError):
+                return self._json_response({'error': 'limit must be an integer', 'code': 400}, 400)
+            related_books = book._get_related_books(limit=limit)
+            
+            return self._json_response({
+                'success': True,
+                'data': [
+                    {
+                        'id': b.id,
+                        'name': b.name,
+                        'isbn': b.isbn,
+                        'authors': [a.name for a in b.author_ids],
+                        'available_copies': b.available_copies,
+                        'average_rating': b.average_rating,
+                    } for b in related_books
+                ]
+            })
+            
+        except Exception as e:
+            _logger.error("API Book Recommendations Error: %s", str(e))
+            return self._json_response({'error': 'Internal server error', 'code': 500}, 500)
+    
     # =============================================================================
     # MEMBERS API ENDPOINTS
     # =============================================================================
@@ -282,6 +319,64 @@ class LibraryAPIController(http.Controller):
             _logger.error("API Member Detail Error: %s", str(e))
             return self._json_response({'error': 'Internal server error', 'code': 500}, 500)
     
+    @http.route('/api/members/<int:member_id>/payments', type='http', auth='user', methods=['POST'], csrf=False)
+    def api_member_payment(self, member_id, **kw):
+        """Take one payment for a member and allocate it to their open fines, oldest first"""
+        access_check = self._check_api_access()
+        if access_check:
+            return self._json_response(access_check, 403)
+        
+        # Only librarians can take payments via API
+        if not request.env.user.has_group('library_management.group_library_librarian'):
+            return self._json_response({'error': 'Librarian access required', 'code': 403}, 403)
+        
+        try:
+            member = request.env['library.member'].browse(member_id)
+            if not member.exists():
+                return self._json_response({'error': 'Member not found', 'code': 404}, 404)
+            
+            try:
+                data = json.loads(request.httprequest.data.decode('utf-8'))
+            except ValueError:
+                data = None
+            if not isinstance(data, dict):
+                return self._json_response({'error': 'A JSON object is required', 'code': 400}, 400)
+            amount = data.get('amount')
+            payment_method = data.get('payment_method', 'cash')
+            if not isinstance(amount, (int, float)) or amount <= 0:
+                return self._json_response({'error': 'A positive amount is required', 'code': 400}, 400)
+            if payment_method not in dict(request.env['library.fine']._fields['payment_method'].selection):
+                return self._json_response({'error': 'Invalid payment_method', 'code': 400}, 400)
+            fine_ids = data.get('fine_ids')
+            if fine_ids is not None and (
+                    not isinstance(fine_ids, list)
+                    or not all(isinstance(fine_id, int) and not isinstance(fine_id, bool) for fine_id in fine_ids)):
+                return self._json_response({'error': 'fine_ids must be a list of fine ids', 'code': 400}, 400)
+            
+            try:
+                allocations = request.env['library.fine']._allocate_member_payment(
+                    member, amount, payment_method, data.get('payment_reference'),
+                    fine_ids=fine_ids,
+                )
+            except ValidationError as e:
+                return self._json_response({'error': str(e), 'code': 400}, 400)
+            
+            return self._json_response({
+                'success': True,
+                'data': {
+                    'member_id': member.id,
+                    'amount': amount,
+                    'allocations': [
+                        {'fine_id': fine_id, 'amount': applied, 'state': state}
+                        for fine_id, applied, state in allocations
+                    ],
+                }
+            })
+            
+        except Exception as e:
+            _logger.error("API Member Payment Error: %s", str(e))
+            return self._json_response({'error': 'Internal server error', 'code': 500}, 500)
+    
     # =============================================================================
     # BORROWING API ENDPOINTS
     # =============================================================================
@@ -396,6 +491,27 @@ class LibraryAPIController(http.Controller):
             _logger.error("API Return Book Error: %s", str(e))
             return self._json_response({'error': str(e), 'code': 500}, 500)
     
+    # =============================================================================
+    # CATEGORIES API ENDPOINTS
+    # =============================================================================
+    
+    @http.route('/api/categories/tree', type='http', auth='user', methods=['GET'], csrf=False)
+    def api_category_tree(self, **kw):
+        """Get the category tree with book, availability and circulation counts per subtree"""
+        access_check = self._check_api_access()
+        if access_check:
+            return self._json_response(access_check, 403)
+        
+        try:
+            return self._json_response({
+                'success': True,
+                'data': request.env['library.category']._get_tree(),
+            })
+            
+        except Exception as e:
+            _logger.error("API Category Tree Error: %s", str(e))
+            return self._json_response({'error': 'Internal server error', 'code': 500}, 500)
+    
     # =============================================================================
     # SEARCH API ENDPOINTS
     # =============================================================================
@@ -414,16 +530,14 @@ class LibraryAPIController(http.Controller):
             
             limit = int(kw.get('limit', 10))
             
-            # Search books
-            books = request.env['library.book'].search([
-                '|', ('name', 'ilike', query),
-                '|', ('isbn', 'ilike', query),
-                ('description', 'ilike', query)
-            ], limit=limit)
+            # Search books - titles and authors through their folded search keys
+            books = request.env['library.book'].search(
+                ['|'] + request.env['library.book']._text_search_domain(query)
+                + [('description', 'ilike', query)], limit=limit)
             
             # Search authors
             authors = request.env['library.author'].search([
-                ('name', 'ilike', query)
+                ('search_key', 'ilike', search_key(query))
             ], limit=limit)
             
             # Search categories
@@ -80,21 +80,16 @@ class LibraryMainController(http.Controller):
             search_term = kw.get('search', '')
             category_id = kw.get('category_id')
             author_id = kw.get('author_id')
+            language = kw.get('language')
+            publisher_id = kw.get('publisher_id')
             available_only = kw.get('available_only', False)
             sort_by = kw.get('sort_by', 'name')
             page = int(kw.get('page', 1))
             per_page = 20
             
             # Build search domain
-            domain = [('active', '=', True)]
-            if search_term:
-                domain.append(['name', 'ilike', search_term])
-            if category_id:
-                domain.append(['category_id', '=', int(category_id)])
-            if author_id:
-                domain.append(['author_ids', 'in', [int(author_id)]])
-            if available_only:
-                domain.extend([['available_copies', '>', 0], ['state', '=', 'available']])
+            domain = request.env['library.book']._catalog_domain(
+                search_term, category_id, author_id, available_only, language, publisher_id)
             
             # Set ordering
             order = 'name'
@@ -108,22 +103,35 @@ class LibraryMainController(http.Controller):
             # Search books with pagination
             offset = (page - 1) * per_page
             books = request.env['library.book'].search(domain, limit=per_page, offset=offset, order=order)
-            total_books = request.env['library.book'].search_count(domain)
             
-            # Get filter options
-            categories = request.env['library.category'].search([('active', '=', True)], order='complete_name')
-            authors = request.env['library.author'].search([('active', '=', True)], order='name')
+            # Facet counts of the current query - their total is the number of matching books
+            facets = request.env['library.book']._get_facets(domain)
+            total_books = facets['total']
+            
+            # Get filter options - the most used ones; the dropdowns page through the rest
+            # with /library/ajax/filter-options, so the page does not grow with the author table
+            categories = request.env['library.category']._get_top_filter_options()
+            authors = request.env['library.author']._get_top_filter_options()
+            publishers = request.env['library.publisher']._get_top_filter_options()
             
             # Pagination
             total_pages = (total_books + per_page - 1) // per_page
             
             values = {
                 'books': books,
+                # Version stamps keying the cached book tiles
+                'book_versions': books._get_render_versions(),
+                # Listings only load the tile thumbnails, never the original covers
+                'tile_urls': books._get_image_urls('cover_image_tile'),
+                'facets': facets,
                 'categories': categories,
                 'authors': authors,
+                'publishers': publishers,
                 'search_term': search_term,
                 'category_id': int(category_id) if category_id else None,
                 'author_id': int(author_id) if author_id else None,
+                'language': language,
+                'publisher_id': int(publisher_id) if publisher_id else None,
                 'available_only': available_only,
                 'sort_by': sort_by,
                 'current_page': page,
@@ -152,12 +160,8 @@ class LibraryMainController(http.Controller):
             if not book.exists():
                 return request.not_found()
             
-            # Get related books (same category or author)
-            related_books = request.env['library.book'].search([
-                '|', ('category_id', '=', book.category_id.id),
-                ('author_ids', 'in', book.author_ids.ids),
-                ('id', '!=', book.id)
-            ], limit=6)
+            # Get related books (borrowed together, or same category or author)
+            related_books = book._get_related_books(limit=6)
             
             # Check if current user can make reservations
             can_reserve = False
@@ -170,6 +174,10 @@ class LibraryMainController(http.Controller):
             values = {
                 'book': book,
                 'related_books': related_books,
+                # Version stamps keying the cached public sections; can_reserve is rendered outside them
+                'book_versions': (book | related_books)._get_render_versions(),
+                'detail_urls': book._get_image_urls('cover_image_detail'),
+                'tile_urls': related_books._get_image_urls('cover_image_tile'),
                 'can_reserve': can_reserve,
                 'current_member': current_member,
                 'is_librarian': request.env.user.has_group('library_management.group_library_librarian'),
@@ -366,36 +374,29 @@ class LibraryMainController(http.Controller):
                 request.session['error_message'] = "Member and book information required"
                 return request.redirect('/library/quick-borrow')
             
-            # Find member
-            member = None
-            # Try by member ID first
-            if member_query.isdigit() or member_query.startswith('M'):
-                member = request.env['library.member'].search([('member_id', '=', member_query)], limit=1)
-            # Try by email
-            if not member:
-                member = request.env['library.member'].search([('email', '=', member_query)], limit=1)
-            # Try by name
-            if not member:
-                member = request.env['library.member'].search([('name', 'ilike', member_query)], limit=1)
+            scan = request.env['library.scan.identifier']
             
+            # Find member by member ID, card or email - one lookup in the scan registry
+            member = scan._resolve(member_query, 'library.member')
+            # Otherwise the closest name, email or ID - only when one member clearly stands out
             if not member:
-                request.session['error_message'] = f"Member not found: {member_query}"
-                return request.redirect('/library/quick-borrow')
-            
-            # Find book
-            book = None
-            # Try by ISBN
-            book = request.env['library.book'].search([('isbn', '=', book_query)], limit=1)
-            # Try by barcode
-            if not book:
-                book = request.env['library.book'].search([('barcode', '=', book_query)], limit=1)
-            # Try by name
+                member, candidates = request.env['library.member']._fuzzy_resolve(member_query)
+                if not member:
+                    request.session['error_message'] = self._quick_borrow_not_resolved(
+                        'Member', member_query, [f"{m.member_id} - {m.name}" for m, _ in candidates])
+                    return request.redirect('/library/quick-borrow')
+            
+            # Find book by ISBN or barcode, or the copy by its item barcode - one lookup in the scan registry
+            scanned = scan._resolve(book_query)
+            copy = scanned if scanned and scanned._name == 'library.book.copy' else None
+            book = copy.book_id if copy else (scanned if scanned and scanned._name == 'library.book' else None)
+            # Otherwise the closest title, ISBN or barcode - only when one book clearly stands out
             if not book:
-                book = request.env['library.book'].search([('name', 'ilike', book_query)], limit=1)
-            
-            if not book:
-                request.session['error_message'] = f"Book not found: {book_query}"
-                return request.redirect('/library/quick-borrow')
+                book, candidates = request.env['library.book']._fuzzy_resolve(book_query)
+                if not book:
+                    request.session['error_message'] = self._quick_borrow_not_resolved(
+                        'Book', book_query, [f"{b.isbn} - {b.name}" for b, _ in candidates])
+                    return request.redirect('/library/quick-borrow')
             
             # Check if member can borrow
             can_borrow, message = member.can_borrow_book()
@@ -404,7 +405,7 @@ class LibraryMainController(http.Controller):
                 return request.redirect('/library/quick-borrow')
             
             # Check book availability
-            if not book.check_availability():
+            if not book.check_availability() or (copy and copy.state != 'on_shelf'):
                 request.session['error_message'] = f"Book not available: {book.name}"
                 return request.redirect('/library/quick-borrow')
             
@@ -412,6 +413,7 @@ class LibraryMainController(http.Controller):
             borrowing = request.env['library.borrowing'].create({
                 'member_id': member.id,
                 'book_id': book.id,
+                'copy_id': copy.id if copy else False,
                 'book_condition_borrow': post.get('book_condition_borrow', 'good'),
                 'notes': post.get('notes', '')
             })
@@ -426,6 +428,12 @@ class LibraryMainController(http.Controller):
             request.session['error_message'] = "Borrowing failed. Please try again."
             return request.redirect('/library/quick-borrow')
     
+    def _quick_borrow_not_resolved(self, kind, query, candidates):
+        """Desk message for a member or book that could not be resolved"""
+        if not candidates:
+            return f"{kind} not found: {query}"
+        return f"Several matches for {query}, please scan or pick one: " + "; ".join(candidates)
+    
     @http.route('/library/quick-return', type='http', auth='user', website=True)
     def quick_return_form(self, **kw):
         """Quick book return form for librarians"""
@@ -468,9 +476,23 @@ class LibraryMainController(http.Controller):
                     ('state', 'in', ['borrowed', 'overdue'])
                 ], limit=1)
             
-            # Try to find by book ISBN or name
+            # Try to find by a scanned book or member code - one lookup in the scan registry
+            scanned = None
+            if not borrowing:
+                scanned = request.env['library.scan.identifier']._resolve(query)
+            
+            # Try to find by the item barcode of the copy
+            if not borrowing and scanned and scanned._name == 'library.book.copy':
+                borrowing = request.env['library.borrowing'].search([
+                    ('copy_id', '=', scanned.id),
+                    ('state', 'in', ['borrowed', 'overdue'])
+                ], limit=1)
+            
+            # Try to find by book ISBN, barcode or name
             if not borrowing:
-                book = request.env['library.book'].search(['|', ('isbn', '=', query), ('name', 'ilike', query)], limit=1)
+                book = scanned if scanned and scanned._name == 'library.book' else None
+                if not book and not scanned:
+                    book = request.env['library.book'].search([('name', 'ilike', query)], limit=1)
                 if book:
                     borrowing = request.env['library.borrowing'].search([
                         ('book_id', '=', book.id),
@@ -479,7 +501,9 @@ class LibraryMainController(http.Controller):
             
             # Try to find by member
             if not borrowing:
-                member = request.env['library.member'].search(['|', ('member_id', '=', query), ('name', 'ilike', query)], limit=1)
+                member = scanned if scanned and scanned._name == 'library.member' else None
+                if not member and not scanned:
+                    member = request.env['library.member'].search([('name', 'ilike', query)], limit=1)
                 if member:
                     borrowings = request.env['library.borrowing'].search([
                         ('member_id', '=', member.id),
@@ -523,6 +547,11 @@ class LibraryMainController(http.Controller):
         try:
             self._check_librarian_access()
             
+            # Answered from the worker's prefix index; searched in the database while it loads
+            results = request.env['library.member']._autocomplete(term)
+            if results is not None:
+                return results
+            
             members = request.env['library.member'].search([
                 '|', '|', ('name', 'ilike', term),
                 ('member_id', 'ilike', term),
@@ -541,15 +570,74 @@ class LibraryMainController(http.Controller):
             _logger.error("AJAX Search Members Error: %s", str(e))
             return []
     
+    @http.route('/library/ajax/resolve', type='json', auth='user')
+    def ajax_resolve(self, kind, term):
+        """AJAX endpoint resolving what was typed at the desk: an exact code, a clear
+        fuzzy match, or a short list of candidates to choose from"""
+        models = {'member': 'library.member', 'book': 'library.book'}
+        if kind not in models:
+            return {'error': f"Unknown kind: {kind}"}
+        try:
+            self._check_librarian_access()
+            
+            model = request.env[models[kind]]
+            record = request.env['library.scan.identifier']._resolve(term, model._name)
+            candidates = []
+            if not record:
+                record, candidates = model._fuzzy_resolve(term)
+            return {
+                'match': {'id': record.id, 'name': record.display_name} if record else None,
+                'candidates': [
+                    {'id': candidate.id, 'name': candidate.display_name, 'score': round(score, 3)}
+                    for candidate, score in candidates
+                ],
+            }
+            
+        except Exception as e:
+            _logger.error("AJAX Resolve Error: %s", str(e))
+            return {'match': None, 'candidates': []}
+    
+    @http.route('/library/ajax/filter-options', type='json', auth='user')
+    def ajax_filter_options(self, kind, prefix='', after=None, limit=20):
+        """AJAX endpoint paging through the options of a catalog filter, by name prefix
+        (`after` is the cursor returned with the previous page)"""
+        models = {
+            'author': 'library.author',
+            'publisher': 'library.publisher',
+            'category': 'library.category',
+        }
+        if kind not in models:
+            return {'error': f"Unknown filter: {kind}"}
+        try:
+            return request.env[models[kind]]._search_filter_options(
+                prefix or '', after or None, min(max(int(limit), 1), 100))
+            
+        except Exception as e:
+            _logger.error("AJAX Filter Options Error: %s", str(e))
+            return {'options': [], 'has_more': False, 'after': None}
+    
+    @http.route('/library/ajax/category-tree', type='json', auth='user')
+    def ajax_category_tree(self):
+        """AJAX endpoint for the category navigation tree, with subtree book counts"""
+        try:
+            return request.env['library.category']._get_tree()
+            
+        except Exception as e:
+            _logger.error("AJAX Category Tree Error: %s", str(e))
+            return []
+    
     @http.route('/library/ajax/search-books', type='json', auth='user')
     def ajax_search_books(self, term):
         """AJAX endpoint to search books for autocomplete"""
         try:
-            books = request.env['library.book'].search([
-                '|', '|', ('name', 'ilike', term),
-                ('isbn', 'ilike', term),
-                ('barcode', 'ilike', term)
-            ], limit=10)
+            # Answered from the worker's prefix index; searched in the database while it loads
+            results = request.env['library.book']._autocomplete(term)
+            if results is not None:
+                return results
+            
+            books = request.env['library.book'].search(
+                ['|'] + request.env['library.book']._text_search_domain(term)
+                + [('barcode', 'ilike', term)], limit=10)
             
             return [{
                 'id': b.id,
@@ -572,18 +660,59 @@ class LibraryMainController(http.Controller):
             if not book.exists():
                 return {'error': 'Book not found'}
             
+            return book._get_availability_snapshot()[book.id]
+            
+        except Exception as e:
+            _logger.error("AJAX Book Availability Error: %s", str(e))
+            return {'error': 'Unable to check availability'}
+    
+    @http.route('/library/ajax/book-availability', type='json', auth='user')
+    def ajax_book_availability_snapshot(self, book_ids):
+        """Availability of several books at once, for the initial state of a page
+        
+        Later changes are pushed on the bus: one channel per book, named by
+        library.book._availability_channel, with 'library.book/availability' notifications.
+        """
+        try:
+            books = request.env['library.book'].browse([int(book_id) for book_id in book_ids[:200]]).exists()
             return {
-                'available_copies': book.available_copies,
-                'total_copies': book.total_copies,
-                'borrowed_copies': book.borrowed_copies,
-                'is_available': book.check_availability(),
-                'reservations_count': len(book.reservation_ids.filtered(lambda r: r.state == 'active'))
+                'books': books._get_availability_snapshot(),
+                'channels': {book.id: books._availability_channel(book.id) for book in books},
             }
             
         except Exception as e:
-            _logger.error("AJAX Book Availability Error: %s", str(e))
+            _logger.error("AJAX Book Availability Snapshot Error: %s", str(e))
             return {'error': 'Unable to check availability'}
     
+    # =============================================================================
+    # IMAGES
+    # =============================================================================
+    
+    @http.route('/library/image/<string:model>/<int:record_id>/<string:field>/<string:checksum>',
+                type='http', auth='user')
+    def library_image(self, model, record_id, field, checksum, **kw):
+        """Thumbnail of a cover, logo or photo, at a URL that changes with the image
+        
+        The URLs come from library.image.mixin._get_image_urls: they carry the checksum of
+        the image, so responses are cached as immutable, with an ETag for revalidation.
+        """
+        if model not in ('library.book', 'library.publisher', 'library.member') \
+                or field not in request.env[model]._image_thumbnail_fields:
+            return request.not_found()
+        record = request.env[model].browse(record_id).exists()
+        if not record:
+            return request.not_found()
+        
+        # An outdated URL (the image was replaced since) leads to the current one
+        current_url = record._get_image_urls(field)[record.id]
+        if not current_url:
+            return request.not_found()
+        if not current_url.endswith(f"/{checksum}"):
+            return request.redirect(current_url)
+        
+        stream = request.env['ir.binary']._get_image_stream_from(record, field)
+        return stream.get_response(immutable=True)
+    
     # =============================================================================
     # REPORTS AND EXPORTS
     # =============================================================================
@@ -0,0 +1,38 @@
+"""Fill the canonical isbn13 of the existing catalog.
+
+isbn13 became a stored compute with a unique constraint. The column already
+exists, so the ORM does not compute it on upgrade: it is filled here, before
+the constraint is added. When several books share the same canonical ISBN
+(e.g. "0-306-40615-2" and "9780306406157"), only the oldest one keeps it and
+the others are logged for a librarian to merge.
+"""
+import logging
+
+from odoo.addons.library_management.tools.import_normalize import to_isbn13
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    cr.execute("ALTER TABLE library_book ADD COLUMN IF NOT EXISTS isbn13 varchar")
+    cr.execute("SELECT id, isbn FROM library_book ORDER BY id")
+    ids = []
+    isbn13s = []
+    seen = {}
+    for book_id, isbn in cr.fetchall():
+        isbn13 = to_isbn13(isbn)
+        if isbn13 and isbn13 in seen:
+            _logger.warning("Book %s has the same ISBN as book %s (%s), isbn13 left empty",
+                            book_id, seen[isbn13], isbn13)
+            isbn13 = ''
+        elif isbn13:
+            seen[isbn13] = book_id
+        ids.append(book_id)
+        isbn13s.append(isbn13 or None)
+    cr.execute("""
+        UPDATE library_book b
+           SET isbn13 = v.isbn13
+          FROM unnest(%s::int[], %s::varchar[]) AS v(id, isbn13)
+         WHERE b.id = v.id
+    """, [ids, isbn13s])
+    _logger.info("Canonical ISBN-13 filled for %s books", len(seen))
@@ -0,0 +1,22 @@
+"""Create the copies of the existing catalog.
+
+Every book gets library.book.copy records up to its total copies. Open
+borrowings are linked to one of them, and that copy is marked borrowed, so
+availability switches to counting copies on the shelf.
+"""
+import logging
+
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    books = env['library.book'].with_context(active_test=False)
+    ids = books.search([], order='id').ids
+    for start in range(0, len(ids), 5000):
+        batch = books.browse(ids[start:start + 5000])
+        batch._generate_copies()
+        batch.invalidate_recordset()
+    _logger.info("Copies generated for %s books", len(ids))
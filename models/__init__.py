@@ -1,12 +1,22 @@
 from . import library_config
+from . import library_filter_option
+from . import library_autocomplete
+from . import library_image
+from . import library_fuzzy_match
 from . import library_category
+from . import library_location
 from . import library_author
 from . import library_publisher
 from . import library_book
+from . import library_book_copy
 from . import library_member
 from . import library_borrowing
 from . import library_fine
+from . import library_fine_payment
 from . import library_reservation
 from . import library_review
 from . import res_partner
-from . import res_users
\ No newline at end of file
+from . import res_users
+from . import library_circulation_daily
+from . import library_book_recommendation
+from . import library_scan_identifier
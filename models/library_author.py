@@ -1,15 +1,27 @@
 from odoo import models, fields, api
 from datetime import date
 from odoo.exceptions import ValidationError
+from ..tools.search_normalize import search_key
 import re
 
 class LibraryAuthor(models.Model):
     _name = 'library.author'
     _description = 'Book Author'
+    _inherit = ['library.filter.option.mixin']
+    _filter_option_count_query = """
+        SELECT rel.author_id, COUNT(*)
+          FROM library_book_author_rel rel
+          JOIN library_book b ON b.id = rel.book_id AND b.active
+      GROUP BY rel.author_id
+      ORDER BY COUNT(*) DESC, rel.author_id
+    """
     _order = 'name'
     _rec_name = 'name'
 
     name = fields.Char(string='Author Name', required=True)
+    # Name folded for accent- and script-insensitive search, trigram-indexed like library.book's
+    search_key = fields.Char('Search Key', compute='_compute_search_key', store=True,
+                             index='trigram', unaccent=False, copy=False)
     biography = fields.Html(string = 'Biography') # rich html content stored as text in the database
     
     birth_date = fields.Date(string= 'Birth Date') 
@@ -45,6 +57,12 @@ class LibraryAuthor(models.Model):
 
     #### Compute Methods ####
 
+    # Folds the name for search (see tools/search_normalize.py)
+    @api.depends('name') # Triggered when name changes
+    def _compute_search_key(self):
+        for author in self:
+            author.search_key = search_key(author.name) or False
+
     # Computes the number of books written by the author
     @api.depends('book_ids') # Triggered when book_ids changes
     def _compute_book_count(self):
@@ -0,0 +1,168 @@
+from odoo import models, api, SUPERUSER_ID
+from odoo.tools.sql import create_index
+from ..tools.prefix_index import PrefixIndex, make_keys
+from datetime import timedelta
+import logging
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+
+class _AutocompleteState:
+    """Prefix index of one model in one database, and when it was last synced."""
+
+    def __init__(self):
+        self.index = PrefixIndex()
+        self.ready = False
+        self.synced_at = None       # database time of the last sync
+        self.checked = 0.0          # monotonic time of the last sync
+        self.counted = 0.0          # monotonic time of the last row count
+        self.built = 0.0            # monotonic time of the last full load
+        self.lock = threading.Lock()  # held by the thread loading or syncing the index
+
+
+# Autocomplete indexes per (database, model), shared by all users of a worker
+_states = {}
+_states_lock = threading.Lock()
+
+
+class LibraryAutocompleteMixin(models.AbstractModel):
+    _name = 'library.autocomplete.mixin'
+    _description = 'Desk Autocomplete Index'
+
+    # Desk type-ahead is answered from a prefix index held in memory by each worker
+    # (see tools/prefix_index.py): a search never queries the database
+    # The index is loaded by a background thread on first use; until then callers fall back
+    # to a database search. Once it is older than _autocomplete_refresh_interval seconds,
+    # a search starts a background sync of the rows written since, and is answered at once
+    # from the current index
+
+    _autocomplete_refresh_interval = 5
+    # Rows written by transactions still open at the last sync carry an earlier write_date
+    _autocomplete_sync_overlap = timedelta(seconds=60)
+    # Deleted rows leave no write_date behind: the active rows are counted this often,
+    # and a count that differs from the index triggers a reload
+    _autocomplete_count_interval = 60
+    # Full reload, for changes committed later than the overlap allows for
+    _autocomplete_rebuild_interval = 3600
+
+    # The delta of a sync is found through write_date
+    def init(self):
+        super().init()
+        if self._abstract:
+            return
+        create_index(self.env.cr, f'{self._table}_write_date_idx', self._table, ['write_date'])
+
+    # Rows to index - all active rows, or the rows of `ids` whatever their state:
+    # (id, active, texts searched by word, codes searched whole, payload)
+    @api.model
+    def _autocomplete_rows(self, ids=None):
+        raise NotImplementedError()
+
+    # Ids of the records whose indexed values may have changed since `since`
+    @api.model
+    def _autocomplete_changed_ids(self, since):
+        self.env.cr.execute(f'SELECT id FROM "{self._table}" WHERE write_date > %s', [since])
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    # Autocomplete entry returned to the desk for a payload of _autocomplete_rows
+    @api.model
+    def _autocomplete_values(self, payload):
+        raise NotImplementedError()
+
+    # Entries of up to `limit` records matching `term`, or None while the index is loading
+    @api.model
+    def _autocomplete(self, term, limit=10):
+        state = self._autocomplete_state()
+        if not state.ready:
+            return None
+        if time.monotonic() - state.checked > self._autocomplete_refresh_interval:
+            self._autocomplete_start(state)
+        return [self._autocomplete_values(payload) for payload in state.index.search(term, limit)]
+
+    @api.model
+    def _autocomplete_state(self):
+        key = (self.env.cr.dbname, self._name)
+        with _states_lock:
+            state = _states.get(key)
+            if state is None:
+                state = _states[key] = _AutocompleteState()
+                self._autocomplete_start(state)
+        return state
+
+    # Loads or syncs the index in its own thread and cursor, unless that is already under way
+    @api.model
+    def _autocomplete_start(self, state):
+        if not state.lock.acquire(blocking=False):
+            return
+        try:
+            threading.Thread(target=self._autocomplete_refresh_thread, args=(state,),
+                             name=f"autocomplete {self._name}", daemon=True).start()
+        except Exception:
+            state.lock.release()
+            raise
+
+    def _autocomplete_refresh_thread(self, state):
+        try:
+            with self.env.registry.cursor() as cr:
+                model = api.Environment(cr, SUPERUSER_ID, {})[self._name]
+                if not state.ready or time.monotonic() - state.built > self._autocomplete_rebuild_interval:
+                    model._autocomplete_load(state)
+                else:
+                    model._autocomplete_sync(state)
+        except Exception:
+            _logger.exception("Autocomplete index of %s could not be refreshed", self._name)
+        finally:
+            state.lock.release()
+
+    @api.model
+    def _autocomplete_load(self, state):
+        started = time.monotonic()
+        synced_at = self._autocomplete_now()
+        state.index.build(
+            (record_id, make_keys(texts, codes), payload)
+            for record_id, active, texts, codes, payload in self._autocomplete_rows()
+            if active
+        )
+        state.synced_at = synced_at
+        state.checked = state.counted = state.built = time.monotonic()
+        state.ready = True
+        _logger.info("Autocomplete index of %s: %s records loaded in %.1fs",
+                     self._name, len(state.index), state.checked - started)
+
+    @api.model
+    def _autocomplete_sync(self, state):
+        synced_at = self._autocomplete_now()
+        changed_ids = self._autocomplete_changed_ids(state.synced_at - self._autocomplete_sync_overlap)
+        entries = []
+        removed_ids = []
+        if changed_ids:
+            for record_id, active, texts, codes, payload in self._autocomplete_rows(changed_ids):
+                if active:
+                    entries.append((record_id, make_keys(texts, codes), payload))
+                else:
+                    removed_ids.append(record_id)
+            state.index.update(entries, removed_ids)
+        if time.monotonic() - state.counted > self._autocomplete_count_interval:
+            state.counted = time.monotonic()
+            self.env.cr.execute(f'SELECT COUNT(*) FROM "{self._table}" WHERE active')
+            if self.env.cr.fetchone()[0] != len(state.index):
+                self._autocomplete_load(state)
+                return
+        state.synced_at = synced_at
+        state.checked = time.monotonic()
+
+    def _autocomplete_now(self):
+        self.env.cr.execute("SELECT NOW() AT TIME ZONE 'UTC'")
+        return self.env.cr.fetchone()[0]
+
+    # Writes in this worker are picked up by the sync started by the next search,
+    # and records deleted here leave this worker's index at once
+    def _autocomplete_touch(self, removed=False):
+        state = _states.get((self.env.cr.dbname, self._name))
+        if state is None:
+            return
+        if removed and state.ready:
+            state.index.update(removed_ids=self.ids)
+        state.checked = 0.0
@@ -1,6 +1,14 @@
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError, UserError
-import re
+from odoo.tools import SQL
+from collections import defaultdict
+from ..tools.cache import TTLCache
+from ..tools.import_normalize import clean_isbn, isbn_is_valid, to_isbn13
+from ..tools.search_normalize import search_key
+from datetime import timedelta
+
+# Facet counts per catalog query, shared by all users of a worker (books carry no record rules)
+_facet_cache = TTLCache(ttl=60, maxsize=512)
 
 class LibraryBook(models.Model):
     _name = 'library.book'
@@ -11,13 +19,22 @@ class LibraryBook(models.Model):
     # Inherit mail features for chatter functionality
     # Chatter is a built-in Odoo feature for logging messages and tracking changes
     # tracking = True, indicates that changes to this field should be tracked in the chatter
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'library.autocomplete.mixin', 'library.image.mixin',
+                'library.fuzzy.match.mixin']
 
     name = fields.Char('Title', required=True, tracking=True)
 
     # ISBN is a unique identifier for books
     isbn = fields.Char('ISBN', required=True, tracking=True)
-    isbn13 = fields.Char('ISBN-13')
+    # Canonical identity of the book - ISBN-10s converted, hyphens and spaces removed
+    # Scanner and search lookups are a single equality probe on its unique index
+    isbn13 = fields.Char('ISBN-13', compute='_compute_isbn13', store=True, copy=False)
+    # ISBN filter of the search view: any formatting of an ISBN-10 or ISBN-13 (see _isbn_search_domain)
+    isbn_search = fields.Char('ISBN Search', compute='_compute_isbn_search', search='_search_isbn_search')
+    # Title folded for accent- and script-insensitive search (see tools/search_normalize.py),
+    # with a trigram index serving 'ilike' - already folded, so not wrapped in unaccent()
+    search_key = fields.Char('Search Key', compute='_compute_search_key', store=True,
+                             index='trigram', unaccent=False, copy=False)
     
     # Many2many relationship to authors
     # Book is able to relate to multiple authors and each author can write multiple books
@@ -57,13 +74,23 @@ class LibraryBook(models.Model):
     edition = fields.Char('Edition')
     
     description = fields.Html('Description')
-    cover_image = fields.Binary('Cover Image')
+    # Original cover, and thumbnails resized from it on write: tile for catalog listings,
+    # detail for the book page, card for kanban views and the desk
+    cover_image = fields.Image('Cover Image', max_width=1920, max_height=1920)
+    cover_image_detail = fields.Image('Cover (Detail)', related='cover_image', max_width=1024, max_height=1024, store=True)
+    cover_image_tile = fields.Image('Cover (Tile)', related='cover_image', max_width=384, max_height=384, store=True)
+    cover_image_card = fields.Image('Cover (Card)', related='cover_image', max_width=128, max_height=128, store=True)
     
     total_copies = fields.Integer('Total Copies', default=1, required=True, tracking=True)
-    available_copies = fields.Integer('Available Copies', compute='_compute_available_copies', store=True)
+    # Count of copies on the shelf, stored and indexed so availability filters never count borrowings
+    available_copies = fields.Integer('Available Copies', compute='_compute_available_copies', store=True, index=True)
+    # Physical items - created up to total_copies by _generate_copies
+    copy_ids = fields.One2many('library.book.copy', 'book_id', 'Copies')
     borrowed_copies = fields.Integer('Borrowed Copies', compute='_compute_borrowed_copies')
     
-    location = fields.Char('Shelf Location', tracking=True)
+    # Structured shelf location; the location Char mirrors its full path for display and the API
+    location_id = fields.Many2one('library.location', 'Location', index=True, tracking=True, ondelete='restrict')
+    location = fields.Char('Shelf Location', compute='_compute_location', store=True, readonly=False, tracking=True)
     
     barcode = fields.Char('Barcode')
     price = fields.Float('Price', digits='Product Price')
@@ -85,7 +112,8 @@ class LibraryBook(models.Model):
     # Computed fields for ratings and popularity
     average_rating = fields.Float('Average Rating', compute='_compute_average_rating', store=True)
     review_count = fields.Integer('Review Count', compute='_compute_review_count', store=True)
-    popularity_score = fields.Float('Popularity Score', compute='_compute_popularity_score', store=True)
+    # Time-decayed popularity - maintained by the nightly _cron_compute_popularity batch, not on checkout
+    popularity_score = fields.Float('Popularity Score', readonly=True, index=True, copy=False)
     
     acquisition_date = fields.Date('Acquisition Date', default=fields.Date.today)
     
@@ -104,16 +132,235 @@ class LibraryBook(models.Model):
     # SQL constraints to enforce data integrity for ISBN uniqueness and positive total copies
     _sql_constraints = [
         ('isbn_unique', 'UNIQUE(isbn)', 'ISBN must be unique!'),
+        ('isbn13_unique', 'UNIQUE(isbn13)', 'A book with the same ISBN already exists!'),
         ('total_copies_positive', 'CHECK(total_copies > 0)', 'Total copies must be positive!'),
     ]
 
+    # Codes registered in library.scan.identifier, by kind
+    _scan_identifier_fields = {'isbn': 'isbn13', 'barcode': 'barcode'}
+
+    _image_thumbnail_fields = ('cover_image_detail', 'cover_image_tile', 'cover_image_card')
+    _fuzzy_match_fields = ('name', 'isbn13', 'barcode')
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        books = super().create(vals_list)
+        self.env['library.scan.identifier']._sync_records(books)
+        books._generate_copies()
+        self._autocomplete_touch()
+        return books
+
+    def write(self, vals):
+        res = super().write(vals)
+        if {'isbn', 'barcode'} & set(vals):
+            self.env['library.scan.identifier']._sync_records(self)
+        if 'total_copies' in vals:
+            self._archive_surplus_copies()
+            self._generate_copies()
+        if {'total_copies', 'state', 'available_copies'} & set(vals):
+            self._notify_availability()
+        self._autocomplete_touch()
+        return res
+
+    def unlink(self):
+        self.env['library.scan.identifier']._unlink_records(self)
+        self._autocomplete_touch(removed=True)
+        return super().unlink()
+
+    # Desk autocomplete: title words, ISBNs and barcode
+    @api.model
+    def _autocomplete_rows(self, ids=None):
+        self.env.cr.execute("""
+            SELECT b.id, b.active, b.name, b.isbn, b.isbn13, b.barcode, b.available_copies,
+                   (SELECT string_agg(a.name, ', ' ORDER BY a.name)
+                      FROM library_book_author_rel rel
+                      JOIN library_author a ON a.id = rel.author_id
+                     WHERE rel.book_id = b.id)
+              FROM library_book b
+             WHERE {}
+        """.format('b.id = ANY(%(ids)s)' if ids is not None else 'b.active'), {'ids': ids})
+        return [
+            (book_id, active, [name], [isbn, isbn13, barcode], (book_id, name, isbn, authors or '', available))
+            for book_id, active, name, isbn, isbn13, barcode, available, authors in self.env.cr.fetchall()
+        ]
+
+    # Availability also changes with copies and borrowings, whose write_date is indexed too
+    @api.model
+    def _autocomplete_changed_ids(self, since):
+        self.env.cr.execute("""
+            SELECT id FROM library_book WHERE write_date > %(since)s
+             UNION
+            SELECT book_id FROM library_book_copy WHERE write_date > %(since)s
+             UNION
+            SELECT book_id FROM library_borrowing WHERE write_date > %(since)s
+        """, {'since': since})
+        return [row[0] for row in self.env.cr.fetchall() if row[0]]
+
+    @api.model
+    def _autocomplete_values(self, payload):
+        book_id, name, isbn, authors, available = payload
+        return {
+            'id': book_id,
+            'name': name,
+            'isbn': isbn,
+            'authors': authors,
+            'available': available,
+            'label': f"{isbn} - {name} (Available: {available})"
+        }
+
+    @api.depends('isbn')
+    def _compute_isbn13(self):
+        for book in self:
+            book.isbn13 = to_isbn13(book.isbn) or False
+
+    @api.depends('name')
+    def _compute_search_key(self):
+        for book in self:
+            book.search_key = search_key(book.name) or False
+
+    # Book of a scanned or typed ISBN-10 or ISBN-13, whatever its formatting
+    @api.model
+    def _find_by_isbn(self, code):
+        isbn13 = to_isbn13(code)
+        return self.search([('isbn13', '=', isbn13)], limit=1) if isbn13 else self.browse()
+
+    # Domain leaf matching a search term against ISBNs: the indexed canonical ISBN-13
+    # when the term is a complete ISBN, a substring match on the raw ISBN otherwise
+    @api.model
+    def _isbn_search_domain(self, term):
+        isbn13 = to_isbn13(term)
+        return [('isbn13', '=', isbn13)] if isbn13 else [('isbn', 'ilike', term)]
+
+    def _compute_isbn_search(self):
+        for book in self:
+            book.isbn_search = book.isbn13 or book.isbn
+
+    def _search_isbn_search(self, operator, value):
+        if operator in ('=', 'ilike', '=ilike', 'like') and value:
+            return self._isbn_search_domain(value)
+        return [('isbn', operator, value)]
+
+    # Domain matching a search term against titles and author names through their folded
+    # search keys, and against ISBNs
+    @api.model
+    def _text_search_domain(self, term):
+        key = search_key(term)
+        return ['|', '|', ('search_key', 'ilike', key), ('author_ids.search_key', 'ilike', key)] \
+            + self._isbn_search_domain(term)
+
+    # Books without a structured location keep their free-text shelf location
+    @api.depends('location_id.complete_name')
+    def _compute_location(self):
+        for book in self:
+            if book.location_id:
+                book.location = book.location_id.complete_name
+
     # Compute method to calculate available copies
-    # It counts the number of borrowed copies and subtracts from total copies
-    @api.depends('borrowing_ids', 'borrowing_ids.state', 'total_copies') # Dependencies triggers for recomputation
+    # Books with copies count their copies on the shelf, with one grouped query for the batch;
+    # books without copies yet subtract their borrowed copies from total copies
+    @api.depends('copy_ids.state', 'copy_ids.active', 'borrowing_ids.state', 'total_copies') # Dependencies triggers for recomputation
     def _compute_available_copies(self):
+        books = self.filtered('id')
+        on_shelf = dict(self.env['library.book.copy']._read_group(
+            [('book_id', 'in', books.ids), ('state', '=', 'on_shelf')], ['book_id'], ['__count'],
+        ))
+        with_copies = {book for book, in self.env['library.book.copy']._read_group(
+            [('book_id', 'in', books.ids)], ['book_id'],
+        )}
+        for book in self:
+            if book in with_copies:
+                book.available_copies = on_shelf.get(book, 0)
+            else:
+                borrowed = len(book.borrowing_ids.filtered(lambda b: b.state == 'borrowed'))
+                book.available_copies = book.total_copies - borrowed
+
+    # Archives the copies of books beyond their total copies, most recent first
+    # Only copies on the shelf are archived: a decrease that would need more is refused
+    def _archive_surplus_copies(self):
+        Copy = self.env['library.book.copy']
+        active_counts = dict(Copy._read_group([('book_id', 'in', self.ids)], ['book_id'], ['__count']))
+        surplus = Copy
         for book in self:
-            borrowed = len(book.borrowing_ids.filtered(lambda b: b.state == 'borrowed'))
-            book.available_copies = book.total_copies - borrowed
+            excess = active_counts.get(book, 0) - book.total_copies
+            if excess <= 0:
+                continue
+            on_shelf = Copy.search([('book_id', '=', book.id), ('state', '=', 'on_shelf')],
+                                   order='id desc', limit=excess)
+            if len(on_shelf) < excess:
+                raise UserError(
+                    f'"{book.name}" has {active_counts[book]} copies and only {len(on_shelf)} on the shelf: '
+                    f'total copies cannot be lowered to {book.total_copies}.'
+                )
+            surplus |= on_shelf
+        if surplus:
+            surplus.write({'active': False})
+
+    # Creates the missing copies of books up to their total copies, with set-based SQL
+    # Copies are numbered after the highest number the book ever used, archived copies included,
+    # so a number is never given twice; the book id and number are padded, never truncated
+    # Borrowings still open without a copy are given one of the new copies, which leaves the shelf
+    def _generate_copies(self):
+        if not self:
+            return
+        self.env.flush_all()
+        cr = self.env.cr
+        cr.execute("""
+            INSERT INTO library_book_copy (
+                book_id, barcode, state, condition, active, location_id, acquisition_date, price,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT b.id,
+                   'C' || LPAD(b.id::text, GREATEST(7, LENGTH(b.id::text)), '0')
+                       || '-' || LPAD(n::text, GREATEST(3, LENGTH(n::text)), '0'),
+                   'on_shelf', 'good', TRUE, b.location_id, b.acquisition_date, b.price,
+                   %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+              FROM library_book b
+             CROSS JOIN LATERAL (
+                    SELECT COUNT(*) FILTER (WHERE c.active) AS active_count,
+                           COALESCE(MAX(SUBSTRING(c.barcode FROM '-([0-9]{1,18})$')::bigint), 0) AS last_number
+                      FROM library_book_copy c
+                     WHERE c.book_id = b.id
+             ) AS existing
+             CROSS JOIN LATERAL generate_series(
+                    existing.last_number + 1,
+                    existing.last_number + b.total_copies - existing.active_count
+             ) AS n
+             WHERE b.id = ANY(%(ids)s)
+         RETURNING id
+        """, {'ids': self.ids, 'uid': self.env.uid})
+        copy_ids = [row[0] for row in cr.fetchall()]
+        if not copy_ids:
+            return
+        cr.execute("""
+            WITH open_borrowing AS (
+                SELECT id, book_id, ROW_NUMBER() OVER (PARTITION BY book_id ORDER BY id) AS n
+                  FROM library_borrowing
+                 WHERE book_id = ANY(%(ids)s) AND copy_id IS NULL AND state IN ('borrowed', 'overdue')
+            ),
+            free_copy AS (
+                SELECT id, book_id, ROW_NUMBER() OVER (PARTITION BY book_id ORDER BY id) AS n
+                  FROM library_book_copy
+                 WHERE id = ANY(%(copy_ids)s)
+            ),
+            linked AS (
+                UPDATE library_borrowing br
+                   SET copy_id = free_copy.id
+                  FROM open_borrowing
+                  JOIN free_copy ON free_copy.book_id = open_borrowing.book_id AND free_copy.n = open_borrowing.n
+                 WHERE br.id = open_borrowing.id
+             RETURNING br.copy_id
+            )
+            UPDATE library_book_copy c
+               SET state = 'borrowed'
+              FROM linked
+             WHERE c.id = linked.copy_id
+        """, {'ids': self.ids, 'copy_ids': copy_ids})
+
+        self.env.invalidate_all()
+        copies = self.env['library.book.copy'].browse(copy_ids)
+        self.env['library.scan.identifier']._sync_records(copies)
+        self.env.add_to_compute(self._fields['available_copies'], self)
+        self.env.flush_all()
 
     # Compute method to calculate borrowed copies
     # It counts the number of currently borrowed copies 
@@ -138,49 +385,13 @@ class LibraryBook(models.Model):
         for book in self:
             book.review_count = len(book.review_ids)
 
-    # Compute method to calculate a popularity score based on borrowings, reviews, and average rating
-    @api.depends('borrowing_ids', 'review_ids', 'average_rating')
-    def _compute_popularity_score(self):
-        for book in self:
-            borrow_count = len(book.borrowing_ids)
-            review_count = len(book.review_ids)
-            rating = book.average_rating
-            book.popularity_score = (borrow_count * 0.5) + (review_count * 0.3) + (rating * 0.2)
-
-    # Constraint to validate ISBN format
-    # It uses helper methods to validate ISBN-10 and ISBN-13 formats
+    # Constraint to validate ISBN format - ISBN-10 or ISBN-13 checksum, with the importer's rules
     @api.constrains('isbn')
     def _check_isbn(self):
         for book in self:
-            if book.isbn and not self._validate_isbn(book.isbn):
+            if book.isbn and not isbn_is_valid(clean_isbn(book.isbn)):
                 raise ValidationError('Invalid ISBN format!')
 
-    # Helper methods for ISBN validation - handles both ISBN-10 and ISBN-13 formats
-    def _validate_isbn(self, isbn):
-        isbn = re.sub(r'[^0-9X]', '', isbn.upper())
-        if len(isbn) == 10:
-            return self._validate_isbn10(isbn)
-        elif len(isbn) == 13:
-            return self._validate_isbn13(isbn)
-        return False
-
-    # Helper method to validate ISBN-10 format - checksum calculation
-    def _validate_isbn10(self, isbn):
-        if len(isbn) != 10:
-            return False
-        check = 0
-        for i in range(9):
-            check += int(isbn[i]) * (10 - i)
-        check = (11 - (check % 11)) % 11
-        return str(check) == isbn[9] or (check == 10 and isbn[9] == 'X')
-
-    # Helper method to validate ISBN-13 format - checksum calculation
-    def _validate_isbn13(self, isbn):
-        if len(isbn) != 13:
-            return False
-        check = sum(int(isbn[i]) * (1 if i % 2 == 0 else 3) for i in range(12))
-        return int(isbn[12]) == (10 - (check % 10)) % 10
-
     # Onchange method to ensure total copies is not set below borrowed copies
     @api.onchange('total_copies')
     def _onchange_total_copies(self):
@@ -201,4 +412,236 @@ class LibraryBook(models.Model):
         self.state = 'damaged'
 
     def check_availability(self):
-        return self.available_copies > 0 and self.state == 'available'
\ No newline at end of file
+        return self.available_copies > 0 and self.state == 'available'
+
+    # Availability of these books, as sent to the portal and desk: {book id: values}
+    # Borrowings and reservations are counted with one grouped query each, for any number of books
+    def _get_availability_snapshot(self):
+        borrowed = dict(self.env['library.borrowing']._read_group(
+            [('book_id', 'in', self.ids), ('state', '=', 'borrowed')], ['book_id'], ['__count']))
+        reserved = dict(self.env['library.reservation']._read_group(
+            [('book_id', 'in', self.ids), ('state', '=', 'active')], ['book_id'], ['__count']))
+        return {
+            book.id: {
+                'available_copies': book.available_copies,
+                'total_copies': book.total_copies,
+                'borrowed_copies': borrowed.get(book, 0),
+                'is_available': book.check_availability(),
+                'reservations_count': reserved.get(book, 0),
+            }
+            for book in self
+        }
+
+    # Bus channel of a book's availability, subscribed to by the pages showing it
+    @api.model
+    def _availability_channel(self, book_id):
+        return f"library.book.availability/{book_id}"
+
+    # Publishes the availability of these books on the bus when the transaction commits
+    # Books changed several times in a transaction are sent once, with their final values
+    def _notify_availability(self):
+        if not self:
+            return
+        pending = self.env.cr.precommit.data.get('library.book.availability')
+        if pending is None:
+            pending = self.env.cr.precommit.data['library.book.availability'] = set()
+            self.env.cr.precommit.add(self.env['library.book'].sudo()._send_availability)
+        pending.update(self.ids)
+
+    @api.model
+    def _send_availability(self):
+        book_ids = self.env.cr.precommit.data.pop('library.book.availability', set())
+        books = self.browse(list(book_ids)).exists()
+        bus = self.env['bus.bus'].sudo()
+        for book_id, values in books._get_availability_snapshot().items():
+            bus._sendone(self._availability_channel(book_id), 'library.book/availability',
+                         dict(values, id=book_id))
+
+    # Catalog domain of the portal and API filters
+    @api.model
+    def _catalog_domain(self, search=None, category_id=None, author_id=None, available_only=False,
+                        language=None, publisher_id=None):
+        domain = [('active', '=', True)]
+        if search:
+            domain += self._text_search_domain(search)
+        if category_id:
+            # A category matches the books of all its subcategories, through parent_path
+            domain.append(('category_id', 'child_of', int(category_id)))
+        if author_id:
+            domain.append(('author_ids', 'in', [int(author_id)]))
+        if language:
+            domain.append(('language', '=', language))
+        if publisher_id:
+            domain.append(('publisher_id', '=', int(publisher_id)))
+        if available_only:
+            domain.extend([('available_copies', '>', 0), ('state', '=', 'available')])
+        return domain
+
+    # Facet counts of the books matching a domain, for narrowing a catalog search
+    # All facets are counted by one statement over the matched set, and cached for a minute
+    # Category counts include the books of every descendant category
+    @api.model
+    def _get_facets(self, domain, limit=20):
+        key = (self.env.cr.dbname, self.env.lang, repr(domain), limit)
+        return _facet_cache.get_or_compute(key, lambda: self._compute_facets(domain, limit))
+
+    @api.model
+    def _clear_facet_cache(self):
+        _facet_cache.clear()
+
+    @api.model
+    def _compute_facets(self, domain, limit):
+        self.env.flush_all()
+        self.env.cr.execute(SQL("""
+            WITH matched AS MATERIALIZED (
+                SELECT b.id, b.category_id, b.language, b.publisher_id,
+                       (b.available_copies > 0 AND b.state = 'available') AS available
+                  FROM library_book b
+                 WHERE b.id IN (%s)
+            )
+            SELECT 'category', category_id::text, COUNT(*) FROM matched GROUP BY category_id
+             UNION ALL
+            SELECT 'language', language, COUNT(*) FROM matched GROUP BY language
+             UNION ALL
+            SELECT 'publisher', publisher_id::text, COUNT(*) FROM matched GROUP BY publisher_id
+             UNION ALL
+            SELECT 'available', available::text, COUNT(*) FROM matched GROUP BY available
+             UNION ALL
+            SELECT 'author', rel.author_id::text, COUNT(*)
+              FROM matched JOIN library_book_author_rel rel ON rel.book_id = matched.id
+          GROUP BY rel.author_id
+        """, self._search(domain).subselect()))
+        counts = defaultdict(dict)
+        for facet, value, count in self.env.cr.fetchall():
+            if value is not None:
+                counts[facet][value] = count
+
+        # Roll the category counts up to every ancestor through parent_path
+        categories = self.env['library.category'].browse([int(value) for value in counts['category']])
+        rollup = defaultdict(int)
+        for category in categories:
+            for ancestor_id in category.parent_path.strip('/').split('/'):
+                rollup[int(ancestor_id)] += counts['category'][str(category.id)]
+        categories = self.env['library.category'].browse(list(rollup))
+
+        def top(model_name, facet):
+            ranked = sorted(counts[facet].items(), key=lambda item: -item[1])[:limit]
+            records = self.env[model_name].browse([int(value) for value, _ in ranked])
+            return [{'id': record.id, 'name': record.display_name, 'count': count}
+                    for record, (_, count) in zip(records, ranked)]
+
+        languages = dict(self._fields['language']._description_selection(self.env))
+        return {
+            'total': sum(counts['available'].values()),
+            'categories': [
+                {'id': category.id, 'name': category.complete_name, 'parent_id': category.parent_id.id or None,
+                 'count': rollup[category.id]}
+                for category in categories.sorted('complete_name')
+            ],
+            'authors': top('library.author', 'author'),
+            'publishers': top('library.publisher', 'publisher'),
+            'languages': [
+                {'value': value, 'name': languages.get(value, value), 'count': count}
+                for value, count in sorted(counts['language'].items(), key=lambda item: -item[1])
+            ],
+            'availability': {
+                'available': counts['available'].get('true', 0),
+                'unavailable': counts['available'].get('false', 0),
+            },
+        }
+
+    # Version stamps of the cached portal fragments of these books: {book id: stamp}
+    # A stamp changes when the book, its authors, publisher or category, or its reviews are written,
+    # so a fragment is rendered again only after its public content may have changed
+    def _get_render_versions(self):
+        if not self:
+            return {}
+        self.env.flush_all()
+        self.env.cr.execute("""
+            SELECT b.id,
+                   GREATEST(b.write_date, c.write_date, p.write_date,
+                            (SELECT MAX(a.write_date)
+                               FROM library_book_author_rel rel
+                               JOIN library_author a ON a.id = rel.author_id
+                              WHERE rel.book_id = b.id),
+                            reviews.write_date),
+                   COALESCE(reviews.count, 0)
+              FROM library_book b
+         LEFT JOIN library_category c ON c.id = b.category_id
+         LEFT JOIN library_publisher p ON p.id = b.publisher_id
+         LEFT JOIN LATERAL (
+                    SELECT MAX(write_date) AS write_date, COUNT(*) AS count
+                      FROM library_review
+                     WHERE book_id = b.id
+                   ) reviews ON TRUE
+             WHERE b.id = ANY(%s)
+        """, [self.ids])
+        # A deleted review lowers the count even when it does not move the latest write_date
+        return {
+            book_id: f"{self.env.lang}-{write_date.isoformat() if write_date else ''}-{review_count}"
+            for book_id, write_date, review_count in self.env.cr.fetchall()
+        }
+
+    # Related books for the detail page - the precomputed neighbours, read with one indexed lookup
+    # Books added since the last recommendation batch fall back to the same category or author
+    def _get_related_books(self, limit=6):
+        self.ensure_one()
+        # Books archived since the last batch are skipped
+        recommendations = self.env['library.book.recommendation'].search(
+            [('book_id', '=', self.id), ('related_book_id.active', '=', True)], order='rank', limit=limit)
+        if recommendations:
+            return recommendations.related_book_id
+        return self.search([
+            '|', ('category_id', '=', self.category_id.id),
+            ('author_ids', 'in', self.author_ids.ids),
+            ('id', '!=', self.id)
+        ], limit=limit)
+
+    @api.model
+    def _cron_compute_popularity(self):
+        """Cron job to recompute the time-decayed popularity score of the whole catalog"""
+        config = self.env['library.config'].get_config()
+        half_life = max(config.popularity_half_life_days, 1)
+        bucket_days = 7
+        # Events older than ten half-lives weigh less than 0.1% and are ignored
+        bucket_count = (half_life * 10) // bucket_days + 1
+        horizon = fields.Date.today() - timedelta(days=bucket_count * bucket_days)
+
+        # Per-book event counts per weekly bucket, in one query
+        self.env.flush_all()
+        self.env.cr.execute("""
+            SELECT ev.book_id, (CURRENT_DATE - ev.day) / %(bucket_days)s AS bucket,
+                   SUM(ev.borrows), SUM(ev.reviews)
+              FROM (
+                    SELECT book_id, borrow_date AS day, 1 AS borrows, 0 AS reviews
+                      FROM library_borrowing
+                     WHERE borrow_date >= %(horizon)s
+                    UNION ALL
+                    SELECT book_id, review_date, 0, 1
+                      FROM library_review
+                     WHERE review_date >= %(horizon)s
+              ) ev
+          GROUP BY ev.book_id, bucket
+        """, {'bucket_days': bucket_days, 'horizon': horizon})
+
+        # Decay weight of every bucket is computed once, then applied to all rows
+        weights = [0.5 ** (bucket * bucket_days / half_life) for bucket in range(bucket_count + 1)]
+        scores = defaultdict(float)
+        for book_id, bucket, borrows, reviews in self.env.cr.fetchall():
+            bucket = min(max(bucket, 0), bucket_count)
+            scores[book_id] += weights[bucket] * (borrows * 0.5 + reviews * 0.3)
+
+        # Bulk write-back - books without recent events decay to their rating component only
+        self.env.cr.execute("""
+            WITH decayed AS (
+                SELECT * FROM unnest(%s::int[], %s::float8[]) AS v(book_id, score)
+            )
+            UPDATE library_book book
+               SET popularity_score = COALESCE(decayed.score, 0.0) + COALESCE(book.average_rating, 0.0) * 0.2
+              FROM library_book src
+         LEFT JOIN decayed ON decayed.book_id = src.id
+             WHERE src.id = book.id
+               AND book.popularity_score IS DISTINCT FROM
+                   COALESCE(decayed.score, 0.0) + COALESCE(book.average_rating, 0.0) * 0.2
+        """, (list(scores.keys()), list(scores.values())))
+        self.invalidate_model(['popularity_score'])
\ No newline at end of file
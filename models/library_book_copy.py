@@ -0,0 +1,100 @@
+from odoo import models, fields, api
+from odoo.tools.sql import create_index
+
+
+class LibraryBookCopy(models.Model):
+    _name = 'library.book.copy'
+    _description = 'Book Copy'
+    _order = 'book_id, barcode'
+    _rec_name = 'barcode'
+
+    # One physical item of a book - borrowings point to the copy that left the shelf
+    # library.book.available_copies is the count of its copies in state 'on_shelf'
+    book_id = fields.Many2one('library.book', 'Book', required=True, index=True, ondelete='cascade')
+    barcode = fields.Char('Barcode', required=True, copy=False)
+    state = fields.Selection([
+        ('on_shelf', 'On Shelf'),
+        ('borrowed', 'Borrowed'),
+        ('maintenance', 'Maintenance'),
+        ('lost', 'Lost'),
+        ('damaged', 'Damaged'),
+    ], 'Status', default='on_shelf', required=True)
+    condition = fields.Selection([
+        ('excellent', 'Excellent'),
+        ('good', 'Good'),
+        ('fair', 'Fair'),
+        ('poor', 'Poor'),
+        ('damaged', 'Damaged'),
+    ], 'Condition', default='good')
+    location_id = fields.Many2one('library.location', 'Location', index=True)
+    acquisition_date = fields.Date('Acquisition Date', default=fields.Date.today)
+    price = fields.Float('Price', digits='Product Price')
+    notes = fields.Text('Notes')
+    active = fields.Boolean('Active', default=True)
+
+    borrowing_ids = fields.One2many('library.borrowing', 'copy_id', 'Borrowing History')
+
+    _sql_constraints = [
+        ('barcode_unique', 'UNIQUE(barcode)', 'Copy barcode must be unique!'),
+    ]
+
+    # Codes registered in library.scan.identifier, by kind
+    _scan_identifier_fields = {'barcode': 'barcode'}
+
+    # Availability is counted per book and state; desk autocomplete follows copies by write_date
+    def init(self):
+        create_index(self.env.cr, 'library_book_copy_book_state_idx',
+                     self._table, ['book_id', 'state'])
+        create_index(self.env.cr, 'library_book_copy_write_date_idx',
+                     self._table, ['write_date'])
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        copies = super().create(vals_list)
+        self.env['library.scan.identifier']._sync_records(copies)
+        copies.book_id._notify_availability()
+        return copies
+
+    def write(self, vals):
+        books = self.book_id
+        res = super().write(vals)
+        if 'barcode' in vals:
+            self.env['library.scan.identifier']._sync_records(self)
+        if {'state', 'active', 'book_id'} & set(vals):
+            (books | self.book_id)._notify_availability()
+        return res
+
+    def unlink(self):
+        self.env['library.scan.identifier']._unlink_records(self)
+        return super().unlink()
+
+    def action_set_on_shelf(self):
+        self.write({'state': 'on_shelf'})
+
+    def action_set_maintenance(self):
+        self.write({'state': 'maintenance'})
+
+    def action_set_lost(self):
+        self.write({'state': 'lost'})
+
+    def action_set_damaged(self):
+        self.write({'state': 'damaged'})
+
+    # Takes one copy of a book off the shelf for a borrowing
+    # The row is locked, and copies locked by a concurrent checkout are skipped,
+    # so two desks never hand out the same copy
+    @api.model
+    def _checkout_copy(self, book):
+        self.flush_model(['book_id', 'state'])
+        self.env.cr.execute("""
+            SELECT id FROM library_book_copy
+             WHERE book_id = %s AND state = 'on_shelf' AND active
+          ORDER BY id
+             LIMIT 1
+               FOR UPDATE SKIP LOCKED
+        """, [book.id])
+        row = self.env.cr.fetchone()
+        copy = self.browse(row[0]) if row else self.browse()
+        if copy:
+            copy.state = 'borrowed'
+        return copy
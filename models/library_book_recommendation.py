@@ -0,0 +1,118 @@
+from odoo import models, fields, api
+from odoo.tools.sql import create_index
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class LibraryBookRecommendation(models.Model):
+    _name = 'library.book.recommendation'
+    _description = 'Book Recommendation'
+    _order = 'book_id, rank'
+
+    # Top-k neighbours of every book, rebuilt by _cron_build_recommendations
+    # Reading the neighbours of a book is a single lookup on (book_id, rank)
+    book_id = fields.Many2one('library.book', 'Book', required=True, ondelete='cascade', readonly=True)
+    related_book_id = fields.Many2one('library.book', 'Recommended Book', required=True, ondelete='cascade', readonly=True)
+    score = fields.Float('Score', readonly=True)
+    rank = fields.Integer('Rank', readonly=True)
+    source = fields.Selection([
+        ('co_borrowing', 'Borrowed Together'),
+        ('similar', 'Same Author or Category'),
+    ], 'Source', readonly=True)
+
+    # Number of neighbours kept per book
+    _top_k = 10
+
+    def init(self):
+        create_index(self.env.cr, 'library_book_recommendation_book_rank_idx',
+                     self._table, ['book_id', 'rank'])
+
+    @api.model
+    def _cron_build_recommendations(self):
+        """Cron job to rebuild the co-borrowing recommendations of the whole catalog"""
+        self.env.flush_all()
+        self.env.cr.execute("DELETE FROM library_book_recommendation")
+
+        # Item-to-item co-borrowing: members who borrowed X and also borrowed Y
+        # The sparse matrix is the (book, related book) pair aggregate; pairs are scored with
+        # the cosine similarity of their reader sets and only the top-k per book are kept
+        self.env.cr.execute("""
+            WITH readers AS (
+                SELECT DISTINCT member_id, book_id FROM library_borrowing
+            ),
+            reader_count AS (
+                SELECT book_id, COUNT(*) AS readers FROM readers GROUP BY book_id
+            ),
+            together AS (
+                SELECT a.book_id, b.book_id AS related_book_id, COUNT(*) AS shared
+                  FROM readers a
+                  JOIN readers b ON b.member_id = a.member_id AND b.book_id != a.book_id
+              GROUP BY a.book_id, b.book_id
+            ),
+            scored AS (
+                SELECT t.book_id, t.related_book_id,
+                       t.shared / SQRT(ra.readers * rb.readers) AS score
+                  FROM together t
+                  JOIN reader_count ra ON ra.book_id = t.book_id
+                  JOIN reader_count rb ON rb.book_id = t.related_book_id
+                  JOIN library_book related ON related.id = t.related_book_id AND related.active
+            ),
+            ranked AS (
+                SELECT book_id, related_book_id, score,
+                       ROW_NUMBER() OVER (PARTITION BY book_id ORDER BY score DESC, related_book_id) AS rank
+                  FROM scored
+            )
+            INSERT INTO library_book_recommendation (
+                book_id, related_book_id, score, rank, source,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT book_id, related_book_id, score, rank, 'co_borrowing',
+                   %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+              FROM ranked
+             WHERE rank <= %(top_k)s
+        """, {'uid': self.env.uid, 'top_k': self._top_k})
+        _logger.info("Book recommendations: %s co-borrowing pairs", self.env.cr.rowcount)
+
+        # Cold start: books nobody has borrowed alongside another get the most popular
+        # books sharing an author, then the most popular books of the same category
+        self.env.cr.execute("""
+            WITH cold AS (
+                SELECT book.id, book.category_id
+                  FROM library_book book
+                 WHERE book.active
+                   AND NOT EXISTS (SELECT 1 FROM library_book_recommendation r WHERE r.book_id = book.id)
+            )
+            INSERT INTO library_book_recommendation (
+                book_id, related_book_id, score, rank, source,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT cold.id, similar.id, 0.0,
+                   ROW_NUMBER() OVER (PARTITION BY cold.id ORDER BY similar.shares_author DESC, similar.popularity_score DESC, similar.id),
+                   'similar',
+                   %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+              FROM cold
+              CROSS JOIN LATERAL (
+                    SELECT other.id, other.popularity_score,
+                           other.id IN (
+                               SELECT rb.book_id
+                                 FROM library_book_author_rel ra
+                                 JOIN library_book_author_rel rb ON rb.author_id = ra.author_id
+                                WHERE ra.book_id = cold.id
+                           ) AS shares_author
+                      FROM library_book other
+                     WHERE other.active
+                       AND other.id != cold.id
+                       AND (other.category_id = cold.category_id
+                            OR other.id IN (
+                               SELECT rb.book_id
+                                 FROM library_book_author_rel ra
+                                 JOIN library_book_author_rel rb ON rb.author_id = ra.author_id
+                                WHERE ra.book_id = cold.id
+                            ))
+                  ORDER BY shares_author DESC, other.popularity_score DESC, other.id
+                     LIMIT %(top_k)s
+              ) similar
+        """, {'uid': self.env.uid, 'top_k': self._top_k})
+        _logger.info("Book recommendations: %s cold-start pairs", self.env.cr.rowcount)
+        self.invalidate_model()
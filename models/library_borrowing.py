@@ -1,5 +1,6 @@
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError, UserError
+from odoo.tools.sql import create_index
 from datetime import date, timedelta
 
 class LibraryBorrowing(models.Model):
@@ -12,6 +13,9 @@ class LibraryBorrowing(models.Model):
     
     member_id = fields.Many2one('library.member', 'Member', required=True, tracking=True)
     book_id = fields.Many2one('library.book', 'Book', required=True, tracking=True)
+    # Physical item that left the shelf - picked automatically from the book's copies on the shelf
+    copy_id = fields.Many2one('library.book.copy', 'Copy', index=True, tracking=True,
+                              domain="[('book_id', '=', book_id)]")
     
     borrow_date = fields.Date('Borrow Date', default=fields.Date.today, required=True, tracking=True)
     due_date = fields.Date('Due Date', compute='_compute_due_date', store=True, tracking=True)
@@ -54,6 +58,11 @@ class LibraryBorrowing(models.Model):
         ('poor', 'Poor'),
         ('damaged', 'Damaged'),
     ], 'Condition at Return')
+
+    # Desk autocomplete follows the availability of books through borrowings' write_date
+    def init(self):
+        create_index(self.env.cr, 'library_borrowing_write_date_idx',
+                     self._table, ['write_date'])
     
     # Relation to fines - borrowing_id is the Many2one field in library.fine
     # fine_ids will hold all fines related to this borrowing
@@ -123,16 +132,49 @@ class LibraryBorrowing(models.Model):
     # Override create and write to enforce borrowing constraints
     @api.model
     def create(self, vals):
+        vals = self._assign_copy(dict(vals))
         borrowing = super().create(vals) # Call the original create method and store the result
         borrowing._check_borrowing_constraints() # Check constraints after creation
+        borrowing.book_id._notify_availability()
         return borrowing
 
     def write(self, vals):
+        books = self.book_id
         result = super().write(vals)
         if 'member_id' in vals or 'book_id' in vals:
             self._check_borrowing_constraints()
+        if 'state' in vals or 'book_id' in vals:
+            (books | self.book_id)._notify_availability()
         return result
 
+    # Takes the copy of a new borrowing off the shelf - the scanned one, or any copy on the shelf
+    # Books without copies yet are borrowed by count, as before
+    @api.model
+    def _assign_copy(self, vals):
+        if vals.get('state', 'borrowed') != 'borrowed':
+            return vals
+        copies = self.env['library.book.copy']
+        if vals.get('copy_id'):
+            copy = copies.browse(vals['copy_id'])
+            if copy.state != 'on_shelf':
+                raise ValidationError(f"Copy {copy.barcode} is not on the shelf!")
+            copy.state = 'borrowed'
+            vals.setdefault('book_id', copy.book_id.id)
+        elif vals.get('book_id') and copies.search_count([('book_id', '=', vals['book_id'])], limit=1):
+            copy = copies._checkout_copy(self.env['library.book'].browse(vals['book_id']))
+            if not copy:
+                raise ValidationError("No copy of this book is on the shelf!")
+            vals['copy_id'] = copy.id
+        return vals
+
+    # Puts the copy of finished borrowings back on the shelf, or records it as lost or damaged
+    def _release_copies(self, state):
+        for record in self.filtered('copy_id'):
+            values = {'state': state}
+            if record.book_condition_return:
+                values['condition'] = record.book_condition_return
+            record.copy_id.write(values)
+
     def _check_borrowing_constraints(self):
         for record in self:
             # Check if member can borrow
@@ -140,7 +182,9 @@ class LibraryBorrowing(models.Model):
             if not can_borrow and record.state == 'borrowed':
                 raise ValidationError(f"Cannot borrow book: {message}")
             
-            # Check if book is available
+            # Check if book is available - a borrowing holding a copy has taken it off the shelf already
+            if record.copy_id:
+                continue
             if not record.book_id.check_availability() and record.state == 'borrowed':
                 raise ValidationError("Book is not available for borrowing!")
 
@@ -160,6 +204,7 @@ class LibraryBorrowing(models.Model):
         self.return_date = fields.Date.today()
         self.return_librarian_id = self.env.user
         self.state = 'returned'
+        self._release_copies('damaged' if self.book_condition_return == 'damaged' else 'on_shelf')
         
         # Create fine if overdue
         if self.fine_amount > 0:
@@ -175,6 +220,7 @@ class LibraryBorrowing(models.Model):
 
     def action_mark_lost(self):
         self.state = 'lost'
+        self._release_copies('lost')
         # Create fine for lost book
         self.env['library.fine'].create({
             'member_id': self.member_id.id,
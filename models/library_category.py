@@ -1,9 +1,24 @@
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError
+from ..tools.cache import TTLCache
+from datetime import timedelta
+
+# Subtree rollups and the navigation tree, shared by all users of a worker
+_rollup_cache = TTLCache(ttl=120, maxsize=16)
+_tree_cache = TTLCache(ttl=300, maxsize=16)
 
 class LibraryCategory(models.Model):
     _name = 'library.category' # library_categoryin the database
     _description = 'Book Category' # Description of the model
+    _inherit = ['library.filter.option.mixin'] # Paged prefix search for the catalog filter
+    _filter_option_column = 'complete_name'
+    _filter_option_count_query = """
+        SELECT category_id, COUNT(*)
+          FROM library_book
+         WHERE active
+      GROUP BY category_id
+      ORDER BY COUNT(*) DESC, category_id
+    """
     
     _parent_name = "parent_id" # Indicates that this models is a hirerarchy and parent_id field points to the parent
     _parent_store = True # for efficient searching in hierarchies maintaining the parent_path field
@@ -33,8 +48,10 @@ class LibraryCategory(models.Model):
     # In reverse side, category_id field must exist in (library.book).
     book_ids = fields.One2many('library.book', 'category_id', string='Books')
     
-    # Computed Integer field (number of books) in this category.
+    # Computed Integer fields, counted over the category and all its descendants
     book_count = fields.Integer(string='Book Count', compute='_compute_book_count')
+    available_count = fields.Integer(string='Available Books', compute='_compute_book_count')
+    circulation_count = fields.Integer(string='Checkouts (12 months)', compute='_compute_book_count')
     
     active = fields.Boolean(string='Active', default=True)
     sequence = fields.Integer(string='Sequence', default=10)
@@ -46,11 +63,15 @@ class LibraryCategory(models.Model):
 
     ####Compute Methods####
 
-    # Computes the number of books in each category
+    # Computes the number of books in each category and its subcategories
     @api.depends('book_ids') # Triggered when book_ids changes to add to the count
     def _compute_book_count(self): # self is a recordset of several categories
+        rollups = self._get_subtree_rollups()
         for category in self: # Iterate through each category in the recordset
-            category.book_count = len(category.book_ids) # Count the number of related books
+            book_count, available_count, circulation_count = rollups.get(category.id, (0, 0, 0))
+            category.book_count = book_count
+            category.available_count = available_count
+            category.circulation_count = circulation_count
 
     @api.depends('name', 'parent_id')
     def _compute_complete_name(self): # self is a recordset of several categories
@@ -67,4 +88,134 @@ class LibraryCategory(models.Model):
         for category in self: # Iterate through each category in the recordset
             if not category._check_recursion(): # Built-in method to check for recursive relationships
                 # If recursion is detected, raise a validation error
-                raise ValidationError('You cannot create recursive categories.') 
\ No newline at end of file
+                raise ValidationError('You cannot create recursive categories.') 
+
+    ####CRUD Methods####
+
+    # The navigation tree changes with the categories themselves; counts follow within the cache delay
+    @api.model_create_multi
+    def create(self, vals_list):
+        categories = super().create(vals_list)
+        self._clear_tree_caches()
+        return categories
+
+    # complete_name of the written categories is recomputed by the ORM; their descendants
+    # are rewritten in bulk, so moving a top-level category is one statement, not one per level
+    def write(self, vals):
+        res = super().write(vals)
+        if 'name' in vals or 'parent_id' in vals:
+            self._update_subtree_complete_names()
+        self._clear_tree_caches()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self._clear_tree_caches()
+        return res
+
+    @api.model
+    def _clear_tree_caches(self):
+        _rollup_cache.clear()
+        _tree_cache.clear()
+
+    # Rewrites complete_name for these categories and all their descendants with one UPDATE
+    # Each name is rebuilt from the ancestors listed in its parent_path, so no level waits for
+    # the one above it, and only rows whose name actually changes are written
+    def _update_subtree_complete_names(self):
+        if not self:
+            return
+        self.flush_model(['name', 'parent_id', 'parent_path', 'complete_name'])
+        prefixes = [category.parent_path + '%' for category in self if category.parent_path]
+        self.env.cr.execute("""
+            UPDATE library_category category
+               SET complete_name = names.complete_name,
+                   write_uid = %s,
+                   write_date = NOW() AT TIME ZONE 'UTC'
+              FROM (
+                    SELECT descendant.id, string_agg(ancestor.name, ' / ' ORDER BY path.depth) AS complete_name
+                      FROM library_category descendant
+                CROSS JOIN LATERAL unnest(string_to_array(rtrim(descendant.parent_path, '/'), '/')::int[])
+                           WITH ORDINALITY AS path(ancestor_id, depth)
+                      JOIN library_category ancestor ON ancestor.id = path.ancestor_id
+                     WHERE descendant.parent_path LIKE ANY(%s)
+                  GROUP BY descendant.id
+                   ) names
+             WHERE category.id = names.id
+               AND category.complete_name IS DISTINCT FROM names.complete_name
+        """, [self.env.uid, prefixes])
+        self.invalidate_model(['complete_name', 'write_uid', 'write_date'])
+        # Category names are shown by the cached catalog filters and facets
+        self._clear_top_filter_options()
+        self.env['library.book']._clear_facet_cache()
+
+    ####Subtree Rollups####
+
+    # {category id: (books, available books, checkouts in the last 12 months)} over each subtree
+    # Cached for a couple of minutes: counts shown in lists and the catalog tolerate that delay
+    @api.model
+    def _get_subtree_rollups(self):
+        return _rollup_cache.get_or_compute(self.env.cr.dbname, self._compute_subtree_rollups)
+
+    # Books are counted once per category, then summed into every ancestor by matching
+    # the descendants' parent_path against the ancestor's as a prefix
+    @api.model
+    def _compute_subtree_rollups(self):
+        self.env.flush_all()
+        since = fields.Date.today() - timedelta(days=365)
+        self.env.cr.execute("""
+            WITH circulation AS (
+                SELECT book_id, COUNT(*) AS checkouts
+                  FROM library_borrowing
+                 WHERE borrow_date >= %s
+              GROUP BY book_id
+            ), direct AS (
+                SELECT b.category_id,
+                       COUNT(*) AS books,
+                       COUNT(*) FILTER (WHERE b.available_copies > 0 AND b.state = 'available') AS available,
+                       COALESCE(SUM(circulation.checkouts), 0) AS checkouts
+                  FROM library_book b
+             LEFT JOIN circulation ON circulation.book_id = b.id
+                 WHERE b.active AND b.category_id IS NOT NULL
+              GROUP BY b.category_id
+            )
+            SELECT ancestor.id, SUM(direct.books), SUM(direct.available), SUM(direct.checkouts)
+              FROM library_category ancestor
+              JOIN library_category descendant ON descendant.parent_path LIKE ancestor.parent_path || '%%'
+              JOIN direct ON direct.category_id = descendant.id
+          GROUP BY ancestor.id
+        """, [since])
+        return {
+            category_id: (int(books), int(available), int(checkouts))
+            for category_id, books, available, checkouts in self.env.cr.fetchall()
+        }
+
+    # Nested active categories with their subtree counts, for catalog navigation
+    @api.model
+    def _get_tree(self):
+        key = (self.env.cr.dbname, self.env.lang)
+        return _tree_cache.get_or_compute(key, self._compute_tree)
+
+    @api.model
+    def _compute_tree(self):
+        rollups = self._get_subtree_rollups()
+        nodes = {}
+        roots = []
+        for category in self.search([], order='parent_path'):
+            book_count, available_count, circulation_count = rollups.get(category.id, (0, 0, 0))
+            node = nodes[category.id] = {
+                'id': category.id,
+                'name': category.name,
+                'complete_name': category.complete_name,
+                'book_count': book_count,
+                'available_count': available_count,
+                'circulation_count': circulation_count,
+                'children': [],
+            }
+            # parent_path order puts every parent before its children; children of an
+            # archived parent are listed as roots
+            parent = nodes.get(category.parent_id.id)
+            (parent['children'] if parent else roots).append(node)
+        for node in nodes.values():
+            node['children'].sort(key=lambda child: child['name'].lower())
+        roots.sort(key=lambda root: root['name'].lower())
+        return roots
@@ -0,0 +1,191 @@
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+from datetime import timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class LibraryCirculationDaily(models.Model):
+    _name = 'library.circulation.daily'
+    _description = 'Daily Circulation Snapshot'
+    _order = 'date desc, category_id, membership_type'
+    _rec_name = 'date'
+
+    # Fact table - one row per day, category and membership type
+    # Rows are only written by the snapshot job with set-based SQL, never by hand
+    date = fields.Date('Date', required=True, index=True, readonly=True)
+    category_id = fields.Many2one('library.category', 'Category', index=True, readonly=True, ondelete='set null')
+    membership_type = fields.Selection([
+        ('student', 'Student'),
+        ('faculty', 'Faculty'),
+        ('staff', 'Staff'),
+        ('public', 'Public'),
+        ('senior', 'Senior Citizen'),
+    ], 'Membership Type', readonly=True)
+
+    checkout_count = fields.Integer('Checkouts', readonly=True)
+    return_count = fields.Integer('Returns', readonly=True)
+    overdue_count = fields.Integer('Overdue Items', readonly=True)
+    reservation_count = fields.Integer('New Reservations', readonly=True)
+    fine_raised_count = fields.Integer('Fines Raised', readonly=True)
+    fine_raised_amount = fields.Float('Fines Raised Amount', digits='Product Price', readonly=True)
+    fine_paid_count = fields.Integer('Fines Paid', readonly=True)
+    fine_paid_amount = fields.Float('Fines Paid Amount', digits='Product Price', readonly=True)
+
+    # Rebuilds the snapshot rows of [date_from, date_to] with one DELETE and one INSERT ... SELECT
+    # Every event source is reduced to (day, category, membership type, counters) and summed
+    @api.model
+    def _refresh_range(self, date_from, date_to):
+        self.env.flush_all()
+        params = {'date_from': date_from, 'date_to': date_to, 'uid': self.env.uid}
+        self.env.cr.execute("""
+            DELETE FROM library_circulation_daily
+             WHERE date BETWEEN %(date_from)s AND %(date_to)s
+        """, params)
+        self.env.cr.execute("""
+            INSERT INTO library_circulation_daily (
+                date, category_id, membership_type,
+                checkout_count, return_count, overdue_count, reservation_count,
+                fine_raised_count, fine_raised_amount, fine_paid_count, fine_paid_amount,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT ev.day, ev.category_id, ev.membership_type,
+                   SUM(ev.checkouts), SUM(ev.returns), SUM(ev.overdues), SUM(ev.reservations),
+                   SUM(ev.fines_raised), SUM(ev.fines_raised_amount), SUM(ev.fines_paid), SUM(ev.fines_paid_amount),
+                   %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+              FROM (
+                    -- Checkouts
+                    SELECT b.borrow_date AS day, bk.category_id, m.membership_type,
+                           1 AS checkouts, 0 AS returns, 0 AS overdues, 0 AS reservations,
+                           0 AS fines_raised, 0.0 AS fines_raised_amount, 0 AS fines_paid, 0.0 AS fines_paid_amount
+                      FROM library_borrowing b
+                      JOIN library_book bk ON bk.id = b.book_id
+                      JOIN library_member m ON m.id = b.member_id
+                     WHERE b.borrow_date BETWEEN %(date_from)s AND %(date_to)s
+                    UNION ALL
+                    -- Returns
+                    SELECT b.return_date, bk.category_id, m.membership_type,
+                           0, 1, 0, 0, 0, 0.0, 0, 0.0
+                      FROM library_borrowing b
+                      JOIN library_book bk ON bk.id = b.book_id
+                      JOIN library_member m ON m.id = b.member_id
+                     WHERE b.return_date BETWEEN %(date_from)s AND %(date_to)s
+                    UNION ALL
+                    -- Items overdue at the end of each day: past due and not yet returned
+                    SELECT d.day::date, bk.category_id, m.membership_type,
+                           0, 0, 1, 0, 0, 0.0, 0, 0.0
+                      FROM library_borrowing b
+                      JOIN library_book bk ON bk.id = b.book_id
+                      JOIN library_member m ON m.id = b.member_id
+                      CROSS JOIN LATERAL generate_series(
+                            GREATEST(b.due_date + 1, %(date_from)s::date),
+                            LEAST(COALESCE(b.return_date - 1, %(date_to)s::date), %(date_to)s::date),
+                            INTERVAL '1 day'
+                      ) AS d(day)
+                     WHERE b.due_date < %(date_to)s
+                       AND (b.return_date IS NULL OR b.return_date > %(date_from)s)
+                       AND b.state != 'lost'
+                    UNION ALL
+                    -- New reservations
+                    SELECT r.reservation_date, bk.category_id, m.membership_type,
+                           0, 0, 0, 1, 0, 0.0, 0, 0.0
+                      FROM library_reservation r
+                      JOIN library_book bk ON bk.id = r.book_id
+                      JOIN library_member m ON m.id = r.member_id
+                     WHERE r.reservation_date BETWEEN %(date_from)s AND %(date_to)s
+                    UNION ALL
+                    -- Fines raised
+                    SELECT f.date_created, bk.category_id, m.membership_type,
+                           0, 0, 0, 0, 1, f.amount, 0, 0.0
+                      FROM library_fine f
+                      JOIN library_member m ON m.id = f.member_id
+                      LEFT JOIN library_borrowing b ON b.id = f.borrowing_id
+                      LEFT JOIN library_book bk ON bk.id = b.book_id
+                     WHERE f.date_created BETWEEN %(date_from)s AND %(date_to)s
+                    UNION ALL
+                    -- Fines settled: counted on the day they are paid in full
+                    SELECT f.date_paid, bk.category_id, m.membership_type,
+                           0, 0, 0, 0, 0, 0.0, 1, 0.0
+                      FROM library_fine f
+                      JOIN library_member m ON m.id = f.member_id
+                      LEFT JOIN library_borrowing b ON b.id = f.borrowing_id
+                      LEFT JOIN library_book bk ON bk.id = b.book_id
+                     WHERE f.date_paid BETWEEN %(date_from)s AND %(date_to)s
+                    UNION ALL
+                    -- Amounts paid: every instalment on its own day
+                    SELECT p.date, bk.category_id, m.membership_type,
+                           0, 0, 0, 0, 0, 0.0, 0, p.amount
+                      FROM library_fine_payment p
+                      JOIN library_fine f ON f.id = p.fine_id
+                      JOIN library_member m ON m.id = f.member_id
+                      LEFT JOIN library_borrowing b ON b.id = f.borrowing_id
+                      LEFT JOIN library_book bk ON bk.id = b.book_id
+                     WHERE p.date BETWEEN %(date_from)s AND %(date_to)s
+                    UNION ALL
+                    -- Fines paid before payment lines were recorded: their paid amount on the day they were settled
+                    SELECT f.date_paid, bk.category_id, m.membership_type,
+                           0, 0, 0, 0, 0, 0.0, 0, COALESCE(f.paid_amount, 0.0)
+                      FROM library_fine f
+                      JOIN library_member m ON m.id = f.member_id
+                      LEFT JOIN library_borrowing b ON b.id = f.borrowing_id
+                      LEFT JOIN library_book bk ON bk.id = b.book_id
+                     WHERE f.date_paid BETWEEN %(date_from)s AND %(date_to)s
+                       AND NOT EXISTS(SELECT 1 FROM library_fine_payment p WHERE p.fine_id = f.id)
+              ) ev
+          GROUP BY ev.day, ev.category_id, ev.membership_type
+        """, params)
+        self.invalidate_model()
+        return self.env.cr.rowcount
+
+    # Backfills a past period chunk by chunk - each chunk is one set-based refresh
+    @api.model
+    def _backfill(self, date_from, date_to, chunk_days=31, commit=False):
+        date_from = fields.Date.to_date(date_from)
+        date_to = fields.Date.to_date(date_to)
+        if date_from > date_to:
+            raise UserError('The backfill start date must be before its end date.')
+        chunk_start = date_from
+        while chunk_start <= date_to:
+            chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), date_to)
+            rows = self._refresh_range(chunk_start, chunk_end)
+            _logger.info("Circulation snapshot %s - %s: %s rows", chunk_start, chunk_end, rows)
+            if commit:
+                self.env.cr.commit()
+            chunk_start = chunk_end + timedelta(days=1)
+
+    @api.model
+    def _cron_snapshot_circulation(self):
+        """Cron job to snapshot the circulation of the days since the last snapshot"""
+        yesterday = fields.Date.today() - timedelta(days=1)
+        self.env.cr.execute("SELECT MAX(date) FROM library_circulation_daily")
+        last_date = self.env.cr.fetchone()[0]
+        # The last snapshotted day is rebuilt too, in case it was taken before the day ended
+        date_from = min(last_date, yesterday) if last_date else yesterday
+        self._backfill(date_from, yesterday, commit=True)
+
+    # Trend series over the snapshot table - reads O(days) rows instead of scanning borrowings
+    # interval is any read_group date granularity (day, week, month, quarter, year)
+    @api.model
+    def get_trend(self, date_from, date_to, interval='month', domain=None):
+        counters = [
+            'checkout_count', 'return_count', 'overdue_count', 'reservation_count',
+            'fine_raised_count', 'fine_raised_amount', 'fine_paid_count', 'fine_paid_amount',
+        ]
+        groups = self._read_group(
+            [('date', '>=', date_from), ('date', '<=', date_to)] + (domain or []),
+            groupby=[f'date:{interval}'],
+            aggregates=[f'{counter}:sum' for counter in counters],
+            order=f'date:{interval}',
+        )
+        return [
+            dict(period=period, **dict(zip(counters, values)))
+            for period, *values in groups
+        ]
+
+    # Same period of two consecutive years side by side for year-over-year comparison
+    @api.model
+    def get_year_over_year(self, year, interval='month', domain=None):
+        current = self.get_trend(f'{year}-01-01', f'{year}-12-31', interval, domain)
+        previous = self.get_trend(f'{year - 1}-01-01', f'{year - 1}-12-31', interval, domain)
+        return {'year': year, 'current': current, 'previous': previous}
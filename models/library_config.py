@@ -27,6 +27,12 @@ class LibraryConfig(models.Model):
     # Notification Settings - default values provided - Integer fields
     reservation_expiry_days = fields.Integer(string='Reservation Expiry Days', default=7)
     overdue_notification_days = fields.Integer(string='Overdue Notification Days', default=3)
+
+    # Popularity decay - a checkout or review loses half of its weight every half-life
+    popularity_half_life_days = fields.Integer(string='Popularity Half-Life (Days)', default=90)
+
+    # Worker processes a queued bulk import may fork to normalize rows
+    import_max_workers = fields.Integer(string='Max Import Workers', default=2)
     
     # Working Hours and Status - Float fields for hours
     working_hours_start = fields.Float(string='Working Hours Start', default=8.0)
@@ -0,0 +1,90 @@
+from odoo import models, api
+from odoo.tools import SQL
+from odoo.tools.sql import create_index, drop_index
+from ..tools.cache import TTLCache
+
+# Most used options of each filter, shared by all users of a worker
+_top_options_cache = TTLCache(ttl=300, maxsize=64)
+
+
+class LibraryFilterOptionMixin(models.AbstractModel):
+    _name = 'library.filter.option.mixin'
+    _description = 'Catalog Filter Options'
+
+    # Catalog filter dropdowns (authors, publishers, categories) are filled page by page
+    # from a prefix search instead of loading the whole table on every catalog page
+
+    # Column shown and prefix-searched in the dropdown
+    _filter_option_column = 'name'
+    # (record id, number of active books) of the records with the most books, most used first
+    _filter_option_count_query = None
+
+    # Prefix searches run on lower(column) LIKE 'prefix%' and page in the byte order of
+    # text_pattern_ops (~<~), so this index serves both the filter and the order
+    def init(self):
+        super().init()
+        if self._abstract:
+            return
+        column = self._filter_option_column
+        drop_index(self.env.cr, f'{self._table}_{column}_lower_prefix_idx', self._table)
+        create_index(self.env.cr, f'{self._table}_{column}_lower_prefix_id_idx',
+                     self._table, [f'lower({column}) text_pattern_ops', 'id'])
+
+    # One page of active options starting with `prefix`, in alphabetical (byte) order
+    # Pages are chained by keyset: `after` is the cursor returned with the previous page,
+    # so a page costs the same at the end of the list as at its start
+    @api.model
+    def _search_filter_options(self, prefix='', after=None, limit=20):
+        self.flush_model([self._filter_option_column, 'active'])
+        pattern = prefix.strip().lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        key = SQL('lower(%s)', SQL.identifier(self._filter_option_column))
+        where = SQL('active AND %s LIKE %s', key, pattern)
+        if after:
+            after_key, after_id = after
+            where = SQL('%s AND (%s ~>~ %s OR (%s = %s AND id > %s))',
+                        where, key, after_key, key, after_key, int(after_id))
+        self.env.cr.execute(SQL("""
+            SELECT id, %(column)s, %(key)s
+              FROM %(table)s
+             WHERE %(where)s
+          ORDER BY %(key)s USING ~<~, id
+             LIMIT %(limit)s
+        """, column=SQL.identifier(self._filter_option_column), key=key,
+            table=SQL.identifier(self._table), where=where, limit=limit + 1))
+        rows = self.env.cr.fetchall()
+        has_more = len(rows) > limit
+        return {
+            'options': [{'id': record_id, 'name': name} for record_id, name, _ in rows[:limit]],
+            'has_more': has_more,
+            'after': [rows[limit - 1][2], rows[limit - 1][0]] if has_more else None,
+        }
+
+    # Options with the most books, for the first render of the catalog - cached for a few minutes
+    @api.model
+    def _get_top_filter_options(self, limit=20):
+        key = (self.env.cr.dbname, self._name, limit)
+        return _top_options_cache.get_or_compute(key, lambda: self._compute_top_filter_options(limit))
+
+    # Archived options are left out before the limit, so the list stays full
+    @api.model
+    def _compute_top_filter_options(self, limit):
+        self.env.flush_all()
+        self.env.cr.execute(f"""
+            SELECT counts.record_id, counts.book_count
+              FROM ({self._filter_option_count_query}) AS counts(record_id, book_count)
+              JOIN "{self._table}" o ON o.id = counts.record_id
+             WHERE o.active
+          ORDER BY counts.book_count DESC, counts.record_id
+             LIMIT %s
+        """, [limit])
+        counts = self.env.cr.fetchall()
+        records = self.browse([record_id for record_id, _ in counts])
+        names = {record.id: record[self._filter_option_column] for record in records}
+        return [
+            {'id': record_id, 'name': names[record_id], 'count': count}
+            for record_id, count in counts
+        ]
+
+    @api.model
+    def _clear_top_filter_options(self):
+        _top_options_cache.clear()
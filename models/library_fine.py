@@ -1,5 +1,7 @@
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError
+from odoo.tools import float_compare, float_round
+from markupsafe import Markup
 from  datetime import timedelta
 class LibraryFine(models.Model):
     _name = 'library.fine'
@@ -45,6 +47,9 @@ class LibraryFine(models.Model):
     
     currency_id = fields.Many2one('res.currency', 'Currency', default=lambda self: self.env.company.currency_id)
 
+    # Every amount paid towards the fine, one line per payment
+    payment_ids = fields.One2many('library.fine.payment', 'fine_id', 'Payments')
+
     @api.depends('member_id', 'reason', 'date_created')
     def _compute_name(self):
         for fine in self:
@@ -75,6 +80,7 @@ class LibraryFine(models.Model):
                 self.state = 'pending'
 
     def action_mark_paid(self):
+        self._record_payment(self.amount - self.paid_amount, self.payment_method)
         self.paid_amount = self.amount
         self.date_paid = fields.Date.today()
         self.state = 'paid'
@@ -89,6 +95,7 @@ class LibraryFine(models.Model):
         if amount <= 0 or amount > self.remaining_amount:
             raise ValidationError("Invalid payment amount!")
         
+        self._record_payment(amount, method, reference)
         self.paid_amount += amount
         self.payment_method = method
         self.payment_reference = reference
@@ -99,4 +106,105 @@ class LibraryFine(models.Model):
         else:
             self.state = 'partial'
         
-        self.message_post(body=f"Partial payment received: {amount}")
\ No newline at end of file
+        self.message_post(body=f"Partial payment received: {amount}")
+
+    def _record_payment(self, amount, method=None, reference=None):
+        if amount > 0:
+            self.env['library.fine.payment'].create({
+                'fine_id': self.id,
+                'member_id': self.member_id.id,
+                'amount': amount,
+                'payment_method': method,
+                'payment_reference': reference,
+            })
+
+    # Applies one payment of a member FIFO across their open fines, oldest first
+    # The open fines are read and locked with a single SELECT ... FOR UPDATE, so concurrent
+    # payments of the same member queue up instead of overwriting each other's paid_amount,
+    # and all allocations are written back with one UPDATE, and recorded as payment lines with one INSERT
+    # fine_ids restricts the allocation to some of the member's fines
+    # Returns [(fine id, amount applied, new state), ...]
+    @api.model
+    def _allocate_member_payment(self, member, amount, method, reference=None, fine_ids=None):
+        precision = self.env['decimal.precision'].precision_get('Product Price')
+        amount = float_round(amount, precision_digits=precision)
+        if float_compare(amount, 0.0, precision_digits=precision) <= 0:
+            raise ValidationError("Payment amount must be positive!")
+
+        self.env['library.fine'].flush_model()
+        query = """
+            SELECT id, amount - COALESCE(paid_amount, 0)
+              FROM library_fine
+             WHERE member_id = %(member_id)s
+               AND state IN ('pending', 'partial')
+        """
+        if fine_ids:
+            query += " AND id = ANY(%(fine_ids)s)"
+        query += " ORDER BY date_created, id FOR UPDATE"
+        self.env.cr.execute(query, {'member_id': member.id, 'fine_ids': list(fine_ids or [])})
+        open_fines = self.env.cr.fetchall()
+
+        outstanding = float_round(sum(remaining for _, remaining in open_fines), precision_digits=precision)
+        if float_compare(amount, outstanding, precision_digits=precision) > 0:
+            raise ValidationError(f"Payment of {amount} exceeds the outstanding fines of {outstanding}!")
+
+        allocations = []
+        left = amount
+        for fine_id, remaining in open_fines:
+            if float_compare(left, 0.0, precision_digits=precision) <= 0:
+                break
+            applied = float_round(min(left, remaining), precision_digits=precision)
+            left = float_round(left - applied, precision_digits=precision)
+            state = 'paid' if float_compare(applied, remaining, precision_digits=precision) >= 0 else 'partial'
+            allocations.append((fine_id, applied, state))
+
+        self.env.cr.execute("""
+            UPDATE library_fine f
+               SET paid_amount = COALESCE(f.paid_amount, 0) + v.applied,
+                   remaining_amount = f.amount - COALESCE(f.paid_amount, 0) - v.applied,
+                   state = v.state,
+                   date_paid = CASE WHEN v.state = 'paid' THEN %(today)s ELSE f.date_paid END,
+                   payment_method = %(method)s,
+                   payment_reference = %(reference)s,
+                   processed_by = %(uid)s,
+                   write_uid = %(uid)s,
+                   write_date = NOW() AT TIME ZONE 'UTC'
+              FROM unnest(%(ids)s::int[], %(applied)s::numeric[], %(states)s::varchar[]) AS v(id, applied, state)
+             WHERE f.id = v.id
+        """, {
+            'ids': [fine_id for fine_id, _, _ in allocations],
+            'applied': [applied for _, applied, _ in allocations],
+            'states': [state for _, _, state in allocations],
+            'today': fields.Date.today(),
+            'method': method,
+            'reference': reference or None,
+            'uid': self.env.uid,
+        })
+        self.env.cr.execute("""
+            INSERT INTO library_fine_payment (
+                fine_id, member_id, date, amount, payment_method, payment_reference, processed_by,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT v.id, %(member_id)s, %(today)s, v.applied, %(method)s, %(reference)s, %(uid)s,
+                   %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+              FROM unnest(%(ids)s::int[], %(applied)s::numeric[]) AS v(id, applied)
+        """, {
+            'ids': [fine_id for fine_id, _, _ in allocations],
+            'applied': [applied for _, applied, _ in allocations],
+            'member_id': member.id,
+            'today': fields.Date.today(),
+            'method': method,
+            'reference': reference or None,
+            'uid': self.env.uid,
+        })
+        self.env['library.fine'].invalidate_model()
+        self.env['library.fine.payment'].invalidate_model()
+
+        # One summary on the member instead of a tracking message per fine
+        fines = self.browse([fine_id for fine_id, _, _ in allocations])
+        lines = Markup().join(
+            Markup("<li>%s: %s (%s)</li>") % (fine.name, applied, dict(self._fields['state'].selection)[state])
+            for fine, (_, applied, state) in zip(fines, allocations)
+        )
+        member.message_post(body=Markup("%s:<ul>%s</ul>") % (f"Payment of {amount} received ({method})", lines))
+        return allocations
@@ -0,0 +1,24 @@
+from odoo import models, fields
+
+
+class LibraryFinePayment(models.Model):
+    _name = 'library.fine.payment'
+    _description = 'Fine Payment'
+    _order = 'date desc, id desc'
+    _rec_name = 'fine_id'
+
+    # One amount applied to one fine - a member payment allocated over several fines
+    # leaves one line per fine, and a fine paid in instalments one line per instalment
+    # Lines are written by library.fine when a payment is taken, never by hand
+    fine_id = fields.Many2one('library.fine', 'Fine', required=True, index=True, readonly=True, ondelete='cascade')
+    member_id = fields.Many2one('library.member', 'Member', required=True, index=True, readonly=True)
+    date = fields.Date('Payment Date', required=True, index=True, readonly=True, default=fields.Date.today)
+    amount = fields.Float('Amount', required=True, digits='Product Price', readonly=True)
+    payment_method = fields.Selection([
+        ('cash', 'Cash'),
+        ('card', 'Card'),
+        ('online', 'Online'),
+        ('bank_transfer', 'Bank Transfer'),
+    ], 'Payment Method', readonly=True)
+    payment_reference = fields.Char('Payment Reference', readonly=True)
+    processed_by = fields.Many2one('res.users', 'Processed By', readonly=True, default=lambda self: self.env.user)
@@ -0,0 +1,67 @@
+from odoo import models, api
+from odoo.tools.sql import create_index
+
+
+class LibraryFuzzyMatchMixin(models.AbstractModel):
+    _name = 'library.fuzzy.match.mixin'
+    _description = 'Fuzzy Desk Matching'
+
+    # When a typed member or book is not an exact code, the desk ranks candidates by trigram
+    # similarity (pg_trgm) over _fuzzy_match_fields instead of taking any 'ilike' match
+
+    # Columns compared to the typed text
+    _fuzzy_match_fields = ()
+    # Best score above which a candidate is taken without asking...
+    _fuzzy_confident_score = 0.6
+    # ...provided the runner-up scores at least this much lower
+    _fuzzy_margin = 0.15
+
+    # Trigram indexes on the compared columns serve the similarity operator
+    def init(self):
+        super().init()
+        if self._abstract or not self.env.registry.has_trigram:
+            return
+        for field_name in self._fuzzy_match_fields:
+            create_index(self.env.cr, f'{self._table}_{field_name}_lower_trgm_idx',
+                         self._table, [f'lower({field_name}) gin_trgm_ops'], method='gin')
+
+    # Up to `limit` active records similar to `term`, best first: [(record, score)]
+    # Without pg_trgm, records containing the term are returned, unscored
+    @api.model
+    def _fuzzy_search(self, term, limit=5):
+        term = (term or '').strip().lower()
+        if not term:
+            return []
+        if not self.env.registry.has_trigram:
+            domain = ['|'] * (len(self._fuzzy_match_fields) - 1) + [
+                (field_name, 'ilike', term) for field_name in self._fuzzy_match_fields
+            ]
+            return [(record, 0.0) for record in self.search(domain, limit=limit)]
+
+        self.flush_model(list(self._fuzzy_match_fields) + ['active'])
+        columns = [f'lower("{field_name}")' for field_name in self._fuzzy_match_fields]
+        scores = ', '.join(f"similarity({column}, %(term)s)" for column in columns)
+        # '%' is the pg_trgm similarity operator - the one the trigram indexes serve
+        matches = ' OR '.join(f"{column} %% %(term)s" for column in columns)
+        self.env.cr.execute(f"""
+            SELECT id, GREATEST({scores}) AS score
+              FROM "{self._table}"
+             WHERE active AND ({matches})
+          ORDER BY score DESC, id
+             LIMIT %(limit)s
+        """, {'term': term, 'limit': limit})
+        rows = self.env.cr.fetchall()
+        records = self.browse([record_id for record_id, _ in rows])
+        return list(zip(records, [score for _, score in rows]))
+
+    # (record, candidates): the record when one candidate clearly stands out, otherwise
+    # an empty recordset and the short list of candidates to choose from
+    @api.model
+    def _fuzzy_resolve(self, term, limit=5):
+        candidates = self._fuzzy_search(term, limit)
+        if len(candidates) == 1 and not self.env.registry.has_trigram:
+            return candidates[0][0], candidates
+        if candidates and candidates[0][1] >= self._fuzzy_confident_score and (
+                len(candidates) == 1 or candidates[0][1] - candidates[1][1] >= self._fuzzy_margin):
+            return candidates[0][0], candidates
+        return self.browse(), candidates
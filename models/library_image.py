@@ -0,0 +1,33 @@
+from odoo import models, api
+
+
+class LibraryImageMixin(models.AbstractModel):
+    _name = 'library.image.mixin'
+    _description = 'Library Image Thumbnails'
+
+    # Covers, logos and photos are resized on write into stored thumbnail fields
+    # (related Image fields with a maximum size, kept as attachments like the originals)
+    # Pages only link thumbnails, through /library/image URLs that carry the attachment checksum:
+    # a new image gets a new URL, so browsers may cache every URL for good
+
+    # Thumbnail fields served by /library/image - originals are never listed here
+    _image_thumbnail_fields = ()
+
+    # {record id: URL of the thumbnail `field_name`, False without image}, with one attachment query
+    def _get_image_urls(self, field_name):
+        if field_name not in self._image_thumbnail_fields:
+            raise ValueError(f"{field_name} is not a thumbnail of {self._name}")
+        attachments = self.env['ir.attachment'].sudo().search_read([
+            ('res_model', '=', self._name),
+            ('res_field', '=', field_name),
+            ('res_id', 'in', self.ids),
+        ], ['res_id', 'checksum'])
+        checksums = {attachment['res_id']: attachment['checksum'] for attachment in attachments}
+        return {
+            record_id: self._image_url(record_id, field_name, checksums[record_id]) if record_id in checksums else False
+            for record_id in self.ids
+        }
+
+    @api.model
+    def _image_url(self, record_id, field_name, checksum):
+        return f"/library/image/{self._name}/{record_id}/{field_name}/{checksum}"
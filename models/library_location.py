@@ -0,0 +1,90 @@
+from odoo import models, fields, api
+from odoo.exceptions import ValidationError
+
+class LibraryLocation(models.Model):
+    _name = 'library.location'
+    _description = 'Shelf Location'
+
+    # Transfers are logged as one summary message on the destination location
+    _inherit = ['mail.thread']
+
+    # Hierarchy of branch > floor > range > shelf, stored with parent_path like library.category
+    # Books of a whole branch or floor are found with one child_of lookup on the indexed parent_path
+    _parent_name = 'parent_id'
+    _parent_store = True
+
+    _rec_name = 'complete_name'
+    _order = 'complete_name'
+
+    name = fields.Char('Location Name', required=True)
+    code = fields.Char('Code')
+    location_type = fields.Selection([
+        ('branch', 'Branch'),
+        ('floor', 'Floor'),
+        ('range', 'Range'),
+        ('shelf', 'Shelf'),
+    ], 'Type', required=True, default='shelf')
+
+    # Full path, e.g. "Main Branch / Floor 2 / Range C / Shelf 4" - also copied onto library.book.location
+    complete_name = fields.Char('Complete Name', compute='_compute_complete_name', store=True, recursive=True)
+
+    parent_id = fields.Many2one('library.location', 'Parent Location', index=True, ondelete='restrict')
+    parent_path = fields.Char(index=True)
+    child_ids = fields.One2many('library.location', 'parent_id', 'Sub-Locations')
+
+    book_ids = fields.One2many('library.book', 'location_id', 'Books')
+    # Books shelved here or anywhere below this location
+    book_count = fields.Integer('Book Count', compute='_compute_book_count')
+
+    active = fields.Boolean('Active', default=True)
+    sequence = fields.Integer('Sequence', default=10)
+
+    _sql_constraints = [
+        ('name_uniq', 'UNIQUE(name, parent_id)', 'Location name must be unique within its parent location!'),
+    ]
+
+    @api.depends('name', 'parent_id.complete_name')
+    def _compute_complete_name(self):
+        for location in self:
+            if location.parent_id:
+                location.complete_name = f"{location.parent_id.complete_name} / {location.name}"
+            else:
+                location.complete_name = location.name
+
+    # One grouped query over the subtree of every location instead of reading book_ids
+    def _compute_book_count(self):
+        counts = dict(self.env['library.book']._read_group(
+            [('location_id', 'child_of', self.ids)], ['location_id'], ['__count'],
+        ))
+        for location in self:
+            location.book_count = sum(
+                count for child, count in counts.items()
+                if child.parent_path.startswith(location.parent_path)
+            ) if location.parent_path else 0
+
+    @api.constrains('parent_id')
+    def _check_parent_id(self):
+        if self._has_cycle():
+            raise ValidationError('You cannot create recursive locations.')
+
+    def action_view_books(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': self.complete_name,
+            'res_model': 'library.book',
+            'view_mode': 'list,form',
+            'domain': [('location_id', 'child_of', self.id)],
+        }
+
+    # Opens the transfer wizard preset to move everything shelved under this location
+    def action_transfer_books(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Transfer Books',
+            'res_model': 'book.transfer.wizard',
+            'view_mode': 'form',
+            'target': 'new',
+            'context': {'default_transfer_mode': 'location', 'default_source_location_id': self.id},
+        }
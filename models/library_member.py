@@ -1,14 +1,19 @@
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError
+from odoo.tools.sql import create_index
+from collections import defaultdict
 from datetime import date, timedelta
 import re
 
 class LibraryMember(models.Model):
     _name = 'library.member'
     _description = 'Library Member'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'library.autocomplete.mixin', 'library.image.mixin',
+                'library.fuzzy.match.mixin']
     _order = 'name'
     _rec_name = 'name'
+    _image_thumbnail_fields = ('photo_tile', 'photo_card')
+    _fuzzy_match_fields = ('name', 'email', 'member_id')
 
     name = fields.Char('Member Name', required=True, tracking=True)
 
@@ -47,7 +52,9 @@ class LibraryMember(models.Model):
     
     # Membership details
     join_date = fields.Date('Join Date', default=fields.Date.today, required=True, tracking=True)
-    expiry_date = fields.Date('Membership Expiry', compute='_compute_expiry_date', store=True)
+    # Derived from join_date and membership_type until a renewal sets renewed_expiry_date
+    expiry_date = fields.Date('Membership Expiry', compute='_compute_expiry_date', store=True, readonly=False)
+    renewed_expiry_date = fields.Date('Renewed Until', copy=False, readonly=True, tracking=True)
     membership_type = fields.Selection([
         ('student', 'Student'),
         ('faculty', 'Faculty'),
@@ -89,7 +96,10 @@ class LibraryMember(models.Model):
     review_ids = fields.One2many('library.review', 'member_id', 'Reviews')
     
      
-    photo = fields.Binary('Photo')
+    # Member photo, with thumbnails resized from it on write
+    photo = fields.Image('Photo', max_width=1024, max_height=1024)
+    photo_tile = fields.Image('Photo (Tile)', related='photo', max_width=256, max_height=256, store=True)
+    photo_card = fields.Image('Photo (Card)', related='photo', max_width=128, max_height=128, store=True)
     
     notes = fields.Text('Notes')
     
@@ -107,6 +117,12 @@ class LibraryMember(models.Model):
     
     library_card_printed = fields.Boolean('Library Card Printed', default=False)
     card_print_date = fields.Date('Card Print Date')
+
+    # Cached card images - rendered once per member and kept as attachments
+    # card_image_code holds the member_id the images were rendered for, so a changed ID re-renders them
+    card_barcode_image = fields.Binary('Card Barcode', attachment=True, copy=False)
+    card_qr_image = fields.Binary('Card QR Code', attachment=True, copy=False)
+    card_image_code = fields.Char('Card Image Code', copy=False)
     
     active = fields.Boolean('Active', default=True)
 
@@ -127,11 +143,67 @@ class LibraryMember(models.Model):
             else:
                 member.age = 0
 
+    # Codes registered in library.scan.identifier, by kind - the member ID is also the card number
+    _scan_identifier_fields = {'member_id': 'member_id', 'email': 'email'}
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        members = super().create(vals_list)
+        self.env['library.scan.identifier']._sync_records(members)
+        self._autocomplete_touch()
+        return members
+
+    def write(self, vals):
+        res = super().write(vals)
+        if {'member_id', 'email'} & set(vals):
+            self.env['library.scan.identifier']._sync_records(self)
+        if {'name', 'member_id', 'email', 'active'} & set(vals):
+            self._autocomplete_touch()
+        return res
+
+    def unlink(self):
+        self.env['library.scan.identifier']._unlink_records(self)
+        self._autocomplete_touch(removed=True)
+        return super().unlink()
+
+    # Desk autocomplete: name words, member ID and email
+    @api.model
+    def _autocomplete_rows(self, ids=None):
+        self.env.cr.execute("""
+            SELECT id, active, name, member_id, email
+              FROM library_member
+             WHERE {}
+        """.format('id = ANY(%(ids)s)' if ids is not None else 'active'), {'ids': ids})
+        return [
+            (member_id, active, [name], [code, email], (member_id, code, name, email))
+            for member_id, active, name, code, email in self.env.cr.fetchall()
+        ]
+
+    @api.model
+    def _autocomplete_values(self, payload):
+        member_id, code, name, email = payload
+        return {
+            'id': member_id,
+            'member_id': code,
+            'name': name,
+            'email': email,
+            'label': f"{code} - {name} ({email})"
+        }
+
+    # The expiry cron looks up active members past their expiry date
+    def init(self):
+        super().init()
+        create_index(self.env.cr, 'library_member_state_expiry_date_idx',
+                     self._table, ['state', 'expiry_date'])
+
     # Compute Method for membership expiry date based on join_date and membership_type
-    @api.depends('join_date', 'membership_type')
+    # A renewed membership expires on its renewal date, whatever the join date or type
+    @api.depends('join_date', 'membership_type', 'renewed_expiry_date')
     def _compute_expiry_date(self):
         for member in self:
-            if member.join_date:
+            if member.renewed_expiry_date:
+                member.expiry_date = member.renewed_expiry_date
+            elif member.join_date:
                 if member.membership_type in ['student', 'faculty', 'staff']:
                     member.expiry_date = member.join_date + timedelta(days=365)
                 else:
@@ -185,12 +257,44 @@ class LibraryMember(models.Model):
     def can_borrow_book(self):
         if self.state != 'active':
             return False, f"Member is {self.state}"
+        if self.expiry_date and self.expiry_date < fields.Date.today():
+            return False, "Membership expired"
         if self.borrowed_count >= self.max_books:
             return False, f"Maximum books limit reached ({self.max_books})"
         if self.fine_amount > 0:
             return False, f"Outstanding fines: {self.fine_amount}"
         return True, "Can borrow"
 
+    # Renews every member of the recordset by `months`, counted from the current expiry date,
+    # or from today for memberships that have already lapsed; expired members are reactivated
+    # New dates are computed once per distinct (expiry date, state) and applied with one write per new date
+    def _renew_memberships(self, months):
+        today = fields.Date.today()
+        groups = self._read_group(
+            [('id', 'in', self.ids)], ['expiry_date:day', 'state'], ['id:array_agg'],
+        )
+        updates = defaultdict(list)
+        for expiry_date, state, member_ids in groups:
+            base = expiry_date if expiry_date and expiry_date >= today else today
+            new_state = 'active' if state == 'expired' else state
+            updates[(fields.Date.add(base, months=months), new_state)].extend(member_ids)
+        members = self.with_context(tracking_disable=True)
+        for (expiry_date, state), member_ids in updates.items():
+            members.browse(member_ids).write({'renewed_expiry_date': expiry_date, 'state': state})
+        return len(self)
+
+    # Expires active memberships past their expiry date, a batch per run
+    # Each batch is committed by the cron runner, which calls again while members remain,
+    # so an interrupted run resumes where it stopped
+    @api.model
+    def _cron_expire_memberships(self, batch_size=1000):
+        """Cron job to move members whose membership has lapsed to the expired state"""
+        domain = [('state', '=', 'active'), ('expiry_date', '<', fields.Date.today())]
+        members = self.search(domain, limit=batch_size, order='expiry_date, id')
+        members.with_context(tracking_disable=True).write({'state': 'expired'})
+        remaining = self.search_count(domain) if len(members) == batch_size else 0
+        self.env['ir.cron']._notify_progress(done=len(members), remaining=remaining)
+
     def action_suspend(self):
         self.state = 'suspended'
 
@@ -200,7 +304,47 @@ class LibraryMember(models.Model):
     def action_block(self):
         self.state = 'blocked'
 
+    # Prints the cards of every selected member - one write for the whole selection
     def action_print_card(self):
-        self.library_card_printed = True
-        self.card_print_date = fields.Date.today()
-        return self.env.ref('library_management.action_report_member_card').report_action(self)
\ No newline at end of file
+        self.write({
+            'library_card_printed': True,
+            'card_print_date': fields.Date.today(),
+        })
+        self._ensure_card_images()
+        return self.env.ref('library_management.action_report_member_card').report_action(self)
+
+    # Renders the barcode and QR images of members that have none yet (or whose member_id changed)
+    # Stored as superuser in one batch - the card report calls this for users who cannot write members
+    def _ensure_card_images(self):
+        members = self.sudo().filtered(lambda m: m.member_id and m.card_image_code != m.member_id)
+        if not members:
+            return
+        report = self.env['ir.actions.report']
+        images = {'card_barcode_image': [], 'card_qr_image': []}
+        for member in members:
+            images['card_barcode_image'].append(report.barcode('Code128', member.member_id, width=600, height=120, humanreadable=1))
+            images['card_qr_image'].append(report.barcode('QR', member.member_id, width=200, height=200))
+        # The images are attachment fields: their attachments are replaced directly, in two calls
+        Attachment = self.env['ir.attachment'].sudo()
+        Attachment.search([
+            ('res_model', '=', self._name),
+            ('res_field', 'in', list(images)),
+            ('res_id', 'in', members.ids),
+        ]).unlink()
+        Attachment.create([
+            {
+                'name': field_name,
+                'res_model': self._name,
+                'res_field': field_name,
+                'res_id': member.id,
+                'type': 'binary',
+                'raw': image,
+            }
+            for field_name, field_images in images.items()
+            for member, image in zip(members, field_images)
+        ])
+        members.flush_recordset(['member_id'])
+        self.env.cr.execute("""
+            UPDATE library_member SET card_image_code = member_id WHERE id = ANY(%s)
+        """, [members.ids])
+        members.invalidate_recordset(['card_barcode_image', 'card_qr_image', 'card_image_code'])
\ No newline at end of file
@@ -5,8 +5,17 @@ import re
 class LibraryPublisher(models.Model):
     _name = 'library.publisher'
     _description = 'Book Publisher'
+    _inherit = ['library.filter.option.mixin', 'library.image.mixin']
+    _filter_option_count_query = """
+        SELECT publisher_id, COUNT(*)
+          FROM library_book
+         WHERE active AND publisher_id IS NOT NULL
+      GROUP BY publisher_id
+      ORDER BY COUNT(*) DESC, publisher_id
+    """
     _order = 'name'
     _rec_name = 'name'
+    _image_thumbnail_fields = ('logo_tile', 'logo_card')
 
     name = fields.Char(string='Publisher Name', required=True)
     address = fields.Text(string='Address')
@@ -28,8 +37,10 @@ class LibraryPublisher(models.Model):
     
     active = fields.Boolean(string='Active', default=True)
     
-    # Publisher logo - an image file stored as binary data - in PostgrSQL stored as bytea - base64 encoded
-    logo = fields.Binary(string='Logo')
+    # Publisher logo - an image stored as an attachment - with thumbnails resized from it on write
+    logo = fields.Image(string='Logo', max_width=1024, max_height=1024)
+    logo_tile = fields.Image(string='Logo (Tile)', related='logo', max_width=256, max_height=256, store=True)
+    logo_card = fields.Image(string='Logo (Card)', related='logo', max_width=128, max_height=128, store=True)
 
     @api.depends('book_ids')  # Recompute when book_ids changes
     def _compute_book_count(self):
@@ -60,6 +60,20 @@ class LibraryReservation(models.Model):
             else:
                 reservation.queue_position = 0
 
+    # Active reservations are part of the availability published for a book
+    @api.model_create_multi
+    def create(self, vals_list):
+        reservations = super().create(vals_list)
+        reservations.book_id._notify_availability()
+        return reservations
+
+    def write(self, vals):
+        books = self.book_id
+        result = super().write(vals)
+        if 'state' in vals or 'book_id' in vals:
+            (books | self.book_id)._notify_availability()
+        return result
+
     def action_fulfill(self):
         if self.state != 'active':
             raise UserError("Only active reservations can be fulfilled!")
@@ -0,0 +1,146 @@
+from odoo import models, fields, api
+from ..tools.import_normalize import to_isbn13
+import logging
+import re
+
+_logger = logging.getLogger(__name__)
+
+
+class LibraryScanIdentifier(models.Model):
+    _name = 'library.scan.identifier'
+    _description = 'Scan Identifier'
+    _rec_name = 'code'
+
+    # Registry of every code that can be scanned or typed at the desk (ISBN, barcode, member ID,
+    # email) mapped to its record, so a scan resolves with one probe on the unique code index
+    # Rows are maintained by the create/write/unlink of the models listed in _scan_models, whose
+    # _scan_identifier_fields map each kind of code to the field holding it
+    code = fields.Char('Code', required=True, readonly=True)
+    kind = fields.Selection([
+        ('isbn', 'ISBN'),
+        ('barcode', 'Barcode'),
+        ('member_id', 'Member ID'),
+        ('email', 'Email'),
+    ], 'Kind', required=True, readonly=True)
+    res_model = fields.Char('Model', required=True, readonly=True)
+    res_id = fields.Many2oneReference('Record', model_field='res_model', required=True, readonly=True)
+
+    # A code identifies one record per model: a copy barcode may equal its book's barcode
+    _sql_constraints = [
+        ('code_unique', 'UNIQUE(code, res_model)', 'A scan code can only identify one record of a model!'),
+    ]
+
+    # Models in resolution order when a code matches several: the copy is the most precise match
+    _scan_models = ['library.book.copy', 'library.book', 'library.member']
+    # Kinds in resolution order, for a code read both as an ISBN and as a plain code
+    _scan_kind_priority = ['barcode', 'isbn', 'member_id', 'email']
+
+    def init(self):
+        self.env.cr.execute("SELECT 1 FROM library_scan_identifier LIMIT 1")
+        if not self.env.cr.fetchone():
+            self._rebuild()
+
+    @api.model
+    def _normalize_code(self, code, kind=None):
+        """Key of a scanned or typed code: ISBNs as ISBN-13, emails lower-cased,
+        other codes upper-cased without spaces or hyphens."""
+        code = (code or '').strip()
+        if kind == 'isbn':
+            return to_isbn13(code)
+        if kind == 'email':
+            return code.lower()
+        return re.sub(r'[\s-]', '', code).upper()
+
+    # Replaces the identifiers of some records of one model with their current codes
+    # When two records of the model claim the same code the first one registered keeps it,
+    # and the collision is logged with both records
+    @api.model
+    def _sync_records(self, records):
+        if not records:
+            return
+        self.env.cr.execute("""
+            DELETE FROM library_scan_identifier
+             WHERE res_model = %s AND res_id = ANY(%s)
+        """, [records._name, records.ids])
+        codes = []
+        kinds = []
+        ids = []
+        for kind, field_name in records._scan_identifier_fields.items():
+            for record in records:
+                code = self._normalize_code(record[field_name], kind)
+                if code:
+                    codes.append(code)
+                    kinds.append(kind)
+                    ids.append(record.id)
+        if codes:
+            self.env.cr.execute("""
+                INSERT INTO library_scan_identifier (
+                    code, kind, res_model, res_id,
+                    create_uid, create_date, write_uid, write_date
+                )
+                SELECT v.code, v.kind, %(model)s, v.res_id,
+                       %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+                  FROM unnest(%(codes)s::varchar[], %(kinds)s::varchar[], %(ids)s::int[]) AS v(code, kind, res_id)
+                    ON CONFLICT (code, res_model) DO NOTHING
+             RETURNING code, res_id
+            """, {'model': records._name, 'codes': codes, 'kinds': kinds, 'ids': ids, 'uid': self.env.uid})
+            registered = set(self.env.cr.fetchall())
+            if len(registered) < len(codes):
+                self._log_collisions(records._name, [
+                    (code, record_id) for code, record_id in zip(codes, ids) if (code, record_id) not in registered
+                ])
+        self.invalidate_model()
+
+    # Codes left unregistered because another record of the model holds them already
+    @api.model
+    def _log_collisions(self, model_name, rejected):
+        self.env.cr.execute("""
+            SELECT code, res_id FROM library_scan_identifier WHERE res_model = %s AND code = ANY(%s)
+        """, [model_name, [code for code, _ in rejected]])
+        holders = dict(self.env.cr.fetchall())
+        for code, record_id in rejected:
+            if holders.get(code) != record_id:
+                _logger.warning("Scan code %s of %s(%s) is not registered: %s(%s) already has it",
+                                code, model_name, record_id, model_name, holders.get(code))
+
+    @api.model
+    def _unlink_records(self, records):
+        self.env.cr.execute("""
+            DELETE FROM library_scan_identifier
+             WHERE res_model = %s AND res_id = ANY(%s)
+        """, [records._name, records.ids])
+        self.invalidate_model()
+
+    # Rebuilds the whole registry, a model at a time, in batches
+    @api.model
+    def _rebuild(self, batch_size=5000):
+        self.env.cr.execute("DELETE FROM library_scan_identifier")
+        for model_name in self._scan_models:
+            model = self.env[model_name].with_context(active_test=False)
+            ids = model.search([], order='id').ids
+            for start in range(0, len(ids), batch_size):
+                batch = model.browse(ids[start:start + batch_size])
+                self._sync_records(batch)
+                batch.invalidate_recordset()
+            _logger.info("Scan identifiers: %s %s records registered", len(ids), model_name)
+
+    # Record identified by a scanned or typed code, with one indexed lookup
+    # The code is tried as an ISBN, an email and a plain code at once; res_model restricts the match
+    # Several matches are ranked by _scan_kind_priority, then _scan_models, so the answer is stable
+    # Returns an empty recordset of res_model (None without res_model) when nothing matches
+    @api.model
+    def _resolve(self, code, res_model=None):
+        empty = self.env[res_model] if res_model else None
+        candidates = {self._normalize_code(code, kind) for kind in ('isbn', 'email', None)} - {''}
+        if not candidates:
+            return empty
+        query = "SELECT res_model, res_id FROM library_scan_identifier WHERE code = ANY(%s)"
+        params = [list(candidates)]
+        if res_model:
+            query += " AND res_model = %s"
+            params.append(res_model)
+        query += " ORDER BY array_position(%s, kind::text), array_position(%s, res_model::text), res_id LIMIT 1"
+        params += [self._scan_kind_priority, self._scan_models]
+        self.env.cr.execute(query, params)
+        row = self.env.cr.fetchone()
+        return self.env[row[0]].browse(row[1]) if row else empty
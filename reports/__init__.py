@@ -1,7 +1,7 @@
 # from . import library_reports
 # from . import book_catalog_report
-# from . import member_card_report
+from . import member_card_report
 # from . import overdue_books_report
-# from . import fine_statement_report
+from . import fine_statement_report
 # from . import monthly_activity_report
 # from . import inventory_report
\ No newline at end of file
@@ -0,0 +1,184 @@
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class FineStatementReport(models.AbstractModel):
+    _name = 'report.library_management.report_fine_statement'
+    _description = 'Fine Statement Report'
+
+    # Report values for one or many members - the open fines of every member are
+    # loaded with a single search instead of one fine_ids access per member
+    # Batch jobs load them once per chunk and pass them in the 'fine_statement_fines' context key
+    @api.model
+    def _get_report_values(self, docids, data=None):
+        members = self.env['library.member'].browse(docids)
+        prefetched = self.env.context.get('fine_statement_fines') or {}
+        if all(member_id in prefetched for member_id in members.ids):
+            fines_by_member = {member_id: prefetched[member_id] for member_id in members.ids}
+        else:
+            fines_by_member = self.env['library.fine.statement.batch']._get_open_fines_by_member(members.ids)
+        return {
+            'doc_ids': docids,
+            'doc_model': 'library.member',
+            'docs': members,
+            'fines_by_member': fines_by_member,
+            'statement_date': (data or {}).get('statement_date') or fields.Date.today(),
+        }
+
+
+class FineStatementBatch(models.Model):
+    _name = 'library.fine.statement.batch'
+    _description = 'Fine Statement Generation Job'
+    _order = 'create_date desc'
+
+    name = fields.Char('Job Name', required=True, default=lambda self: f"Fine Statements {fields.Date.today()}")
+    statement_date = fields.Date('Statement Date', default=fields.Date.today, required=True)
+
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], 'Status', default='draft', required=True)
+
+    # Members are rendered in chunks of batch_size, at most max_workers chunks at a time
+    batch_size = fields.Integer('Members per Batch', default=200, required=True)
+    max_workers = fields.Integer('Parallel Workers', default=4, required=True)
+
+    # Progress tracking
+    total_members = fields.Integer('Members to Process', readonly=True)
+    processed_members = fields.Integer('Members Processed', readonly=True)
+    progress = fields.Float('Progress (%)', compute='_compute_progress')
+    date_start = fields.Datetime('Started On', readonly=True)
+    date_end = fields.Datetime('Finished On', readonly=True)
+    error_log = fields.Text('Errors', readonly=True)
+
+    _sql_constraints = [
+        ('batch_size_positive', 'CHECK(batch_size > 0)', 'Batch size must be positive!'),
+        ('max_workers_positive', 'CHECK(max_workers > 0)', 'Number of workers must be positive!'),
+    ]
+
+    @api.depends('total_members', 'processed_members')
+    def _compute_progress(self):
+        for job in self:
+            if job.total_members:
+                job.progress = 100.0 * job.processed_members / job.total_members
+            else:
+                job.progress = 0.0
+
+    # Members with an outstanding balance, computed by the database in one grouped query
+    @api.model
+    def _get_member_ids_with_balance(self):
+        self.env['library.fine'].flush_model(['member_id', 'state', 'amount', 'paid_amount'])
+        self.env.cr.execute("""
+            SELECT member_id
+              FROM library_fine
+             WHERE state IN ('pending', 'partial')
+          GROUP BY member_id
+            HAVING SUM(amount - COALESCE(paid_amount, 0)) > 0
+          ORDER BY member_id
+        """)
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    # Open fines of many members in a single search, grouped per member id
+    @api.model
+    def _get_open_fines_by_member(self, member_ids):
+        fines_by_member = {member_id: self.env['library.fine'] for member_id in member_ids}
+        if not member_ids:
+            return fines_by_member
+        fines = self.env['library.fine'].search([
+            ('member_id', 'in', list(member_ids)),
+            ('state', 'in', ['pending', 'partial']),
+        ], order='member_id, date_created, id')
+        for fine in fines:
+            fines_by_member[fine.member_id.id] |= fine
+        return fines_by_member
+
+    def action_generate(self):
+        for job in self:
+            if job.state in ['queued', 'running']:
+                raise UserError('This statement job is already scheduled.')
+        self.write({'state': 'queued', 'processed_members': 0, 'error_log': False})
+        self.env.ref('library_management.ir_cron_library_fine_statements')._trigger()
+
+    def action_reset(self):
+        self.write({'state': 'draft'})
+
+    @api.model
+    def _cron_process_statement_batches(self):
+        """Cron job to render the queued fine statement jobs"""
+        for job in self.search([('state', '=', 'queued')], order='create_date'):
+            job._run()
+
+    # Renders every statement of the job - each chunk of members is rendered by a worker
+    # thread with its own cursor, so up to max_workers wkhtmltopdf processes run at once
+    def _run(self):
+        self.ensure_one()
+        member_ids = self._get_member_ids_with_balance()
+        self.write({
+            'state': 'running',
+            'total_members': len(member_ids),
+            'processed_members': 0,
+            'date_start': fields.Datetime.now(),
+            'date_end': False,
+        })
+        self.env.cr.commit()
+
+        statement_date = fields.Date.to_string(self.statement_date)
+        chunks = [member_ids[i:i + self.batch_size] for i in range(0, len(member_ids), self.batch_size)]
+        errors = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._render_statement_chunk, chunk, statement_date): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    _logger.error("Fine statement chunk failed (%s members): %s", len(chunk), str(e))
+                    errors.append(f"Members {chunk[0]}-{chunk[-1]}: {e}")
+                self.processed_members += len(chunk)
+                self.env.cr.commit()
+
+        self.write({
+            'state': 'failed' if errors else 'done',
+            'date_end': fields.Datetime.now(),
+            'error_log': '\n'.join(errors) or False,
+        })
+        self.env.cr.commit()
+
+    # Runs inside a worker thread - renders the statements of a chunk of members and
+    # stores them as attachments on the members, committing once per chunk
+    # The open fines of the chunk are loaded once for all its statements, and a statement
+    # rendered again for the same date replaces the previous attachment
+    def _render_statement_chunk(self, member_ids, statement_date):
+        with self.env.registry.cursor() as cr:
+            env = api.Environment(cr, self.env.uid, self.env.context)
+            report = env.ref('library_management.action_report_fine_statement')
+            members = env['library.member'].browse(member_ids)
+            fines_by_member = env['library.fine.statement.batch']._get_open_fines_by_member(members.ids)
+            Report = env['ir.actions.report'].with_context(fine_statement_fines=fines_by_member)
+            names = {member.id: f"Fine Statement - {member.member_id} - {statement_date}.pdf" for member in members}
+            env['ir.attachment'].search([
+                ('res_model', '=', 'library.member'),
+                ('res_id', 'in', members.ids),
+                ('name', 'in', list(set(names.values()))),
+            ]).filtered(lambda attachment: attachment.name == names[attachment.res_id]).unlink()
+            attachment_vals = []
+            for member in members:
+                pdf_content, _ = Report._render_qweb_pdf(
+                    report, member.ids, data={'statement_date': statement_date})
+                attachment_vals.append({
+                    'name': names[member.id],
+                    'type': 'binary',
+                    'raw': pdf_content,
+                    'mimetype': 'application/pdf',
+                    'res_model': 'library.member',
+                    'res_id': member.id,
+                })
+            env['ir.attachment'].create(attachment_vals)
+        return len(member_ids)
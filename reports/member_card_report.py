@@ -0,0 +1,24 @@
+from odoo import models, api
+
+
+class MemberCardReport(models.AbstractModel):
+    _name = 'report.library_management.report_member_card'
+    _description = 'Library Card Report'
+
+    # Number of cards laid out on one printed sheet (2 columns x 4 rows)
+    _cards_per_sheet = 8
+
+    # Report values for a batch of members - the cached images are read once for the
+    # whole selection and the cards are split into sheets for the multi-card layout
+    @api.model
+    def _get_report_values(self, docids, data=None):
+        members = self.env['library.member'].browse(docids)
+        members._ensure_card_images()
+        sheets = [members[i:i + self._cards_per_sheet] for i in range(0, len(members), self._cards_per_sheet)]
+        return {
+            'doc_ids': docids,
+            'doc_model': 'library.member',
+            'docs': members,
+            'sheets': sheets,
+            'config': self.env['library.config'].get_config(),
+        }
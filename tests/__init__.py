@@ -0,0 +1,2 @@
+from . import test_library_fine
+from . import test_library_member
@@ -0,0 +1,113 @@
+from odoo import SUPERUSER_ID, api, fields
+from odoo.exceptions import ValidationError
+from odoo.sql_db import db_connect
+from odoo.tests import TransactionCase, tagged
+from datetime import timedelta
+import psycopg2.errors
+
+
+@tagged('post_install', '-at_install')
+class TestFinePaymentAllocation(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.member = cls.env['library.member'].create({'name': 'Paying Member', 'email': 'paying.member@example.com'})
+        today = fields.Date.today()
+        # Oldest first: 10, then 20, then 30
+        cls.fines = cls.env['library.fine'].create([
+            {'member_id': cls.member.id, 'amount': amount, 'reason': 'late_return',
+             'date_created': today - timedelta(days=days)}
+            for amount, days in ((10.0, 30), (20.0, 20), (30.0, 10))
+        ])
+
+    def _allocate(self, amount, fine_ids=None):
+        return self.env['library.fine']._allocate_member_payment(self.member, amount, 'cash', 'REF', fine_ids=fine_ids)
+
+    def test_allocation_is_fifo(self):
+        allocations = self._allocate(25.0)
+        self.assertEqual(allocations, [
+            (self.fines[0].id, 10.0, 'paid'),
+            (self.fines[1].id, 15.0, 'partial'),
+        ])
+        self.assertEqual(self.fines.mapped('state'), ['paid', 'partial', 'pending'])
+        self.assertEqual(self.fines.mapped('paid_amount'), [10.0, 15.0, 0.0])
+        self.assertEqual(self.fines.mapped('remaining_amount'), [0.0, 5.0, 30.0])
+        self.assertEqual(self.fines[0].date_paid, fields.Date.today())
+        self.assertFalse(self.fines[1].date_paid)
+
+    def test_partial_payments_accumulate(self):
+        self._allocate(15.0)
+        self._allocate(10.0)
+        self.assertEqual(self.fines.mapped('paid_amount'), [10.0, 15.0, 0.0])
+        self._allocate(5.0)
+        self.assertEqual(self.fines[1].state, 'paid')
+        self.assertEqual(self.fines[1].paid_amount, 20.0)
+        self.assertEqual(self.fines[2].state, 'pending')
+
+    def test_each_instalment_is_recorded(self):
+        self._allocate(25.0)
+        self._allocate(5.0)
+        self.fines[2].action_partial_payment(12.0, 'card', 'CARD-1')
+        self.assertEqual(self.fines[0].payment_ids.mapped('amount'), [10.0])
+        self.assertEqual(sorted(self.fines[1].payment_ids.mapped('amount')), [5.0, 15.0])
+        self.assertEqual(self.fines[2].payment_ids.mapped('amount'), [12.0])
+        self.assertEqual(set(self.fines.payment_ids.mapped('date')), {fields.Date.today()})
+        self.assertEqual(self.fines[2].payment_ids.payment_method, 'card')
+
+        self.fines[2].action_mark_paid()
+        self.assertEqual(sorted(self.fines[2].payment_ids.mapped('amount')), [12.0, 18.0])
+
+    def test_payment_restricted_to_fines(self):
+        allocations = self._allocate(30.0, fine_ids=self.fines[2].ids)
+        self.assertEqual(allocations, [(self.fines[2].id, 30.0, 'paid')])
+        self.assertEqual(self.fines.mapped('state'), ['pending', 'pending', 'paid'])
+
+    def test_overpayment_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            self._allocate(60.01)
+        with self.assertRaises(ValidationError):
+            self._allocate(0.0)
+        self.assertEqual(self.fines.mapped('state'), ['pending', 'pending', 'pending'])
+
+
+@tagged('post_install', '-at_install')
+class TestFinePaymentLocking(TransactionCase):
+    """The open fines of a member stay locked until the paying transaction ends.
+
+    The fines are committed and paid from separate connections, so that
+    another connection can try to lock the rows the payment holds.
+    """
+
+    def setUp(self):
+        super().setUp()
+        with db_connect(self.cr.dbname).cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            member = env['library.member'].create({'name': 'Locked Member', 'email': 'locked.member@example.com'})
+            fines = env['library.fine'].create([
+                {'member_id': member.id, 'amount': amount, 'reason': 'late_return'} for amount in (10.0, 20.0)
+            ])
+            cr.commit()
+            self.member_id, self.fine_ids = member.id, fines.ids
+        self.addCleanup(self._delete_fixtures)
+
+    def _delete_fixtures(self):
+        with db_connect(self.cr.dbname).cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            env['library.fine'].browse(self.fine_ids).unlink()
+            env['library.member'].browse(self.member_id).unlink()
+            cr.commit()
+
+    def test_open_fines_are_locked_while_paying(self):
+        with db_connect(self.cr.dbname).cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            try:
+                env['library.fine']._allocate_member_payment(env['library.member'].browse(self.member_id), 5.0, 'cash')
+                with db_connect(self.cr.dbname).cursor() as other:
+                    with self.assertRaises(psycopg2.errors.LockNotAvailable):
+                        other.execute("SELECT id FROM library_fine WHERE id = ANY(%s) FOR UPDATE NOWAIT",
+                                      [self.fine_ids])
+                    other.rollback()
+            finally:
+                # The payment is never committed: its locks are released here
+                cr.rollback()
@@ -0,0 +1,39 @@
+from odoo import fields
+from odoo.tests import Form, TransactionCase, tagged
+from datetime import timedelta
+
+
+@tagged('post_install', '-at_install')
+class TestLibraryMember(TransactionCase):
+
+    def _create_member(self, email, **vals):
+        return self.env['library.member'].create({'name': 'Test Member', 'email': email, **vals})
+
+    def test_expiry_follows_membership_type(self):
+        today = fields.Date.today()
+        member = self._create_member('expiry@example.com', join_date=today)
+        self.assertEqual(member.expiry_date, today + timedelta(days=730))
+
+        member.membership_type = 'student'
+        self.assertEqual(member.expiry_date, today + timedelta(days=365))
+
+        member.join_date = today - timedelta(days=10)
+        self.assertEqual(member.expiry_date, today + timedelta(days=355))
+
+    def test_expiry_follows_membership_type_in_form(self):
+        with Form(self.env['library.member']) as form:
+            form.name = 'Form Member'
+            form.email = 'form.member@example.com'
+            form.membership_type = 'staff'
+            self.assertEqual(form.expiry_date, form.join_date + timedelta(days=365))
+
+    def test_renewal_survives_type_change(self):
+        today = fields.Date.today()
+        member = self._create_member('renewal@example.com', join_date=today, membership_type='student')
+        member._renew_memberships(12)
+        renewed = fields.Date.add(today + timedelta(days=365), months=12)
+        self.assertEqual(member.expiry_date, renewed)
+
+        member.membership_type = 'public'
+        member.join_date = today - timedelta(days=30)
+        self.assertEqual(member.expiry_date, renewed)
@@ -0,0 +1,5 @@
+from . import marc
+from . import import_normalize
+from . import cache
+from . import search_normalize
+from . import prefix_index
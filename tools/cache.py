@@ -0,0 +1,55 @@
+"""Small in-process caches for read-mostly catalog data.
+
+Every Odoo worker holds its own caches. Entries expire after a fixed time to
+live, so changes made through another worker show up after at most that delay.
+Writers in the same worker call clear() to see their change at once.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe LRU mapping whose entries expire `ttl` seconds after being set."""
+
+    def __init__(self, ttl=60, maxsize=256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """Cached value of `key`, computed by `compute()` on a miss.
+
+        The value is computed outside the lock: two concurrent misses may both
+        compute it, which is cheaper than serializing every request behind one.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,159 @@
+"""Pure normalization and validation of book import records.
+
+Nothing here touches the database, so chunks of records can be normalized in
+worker processes. normalize_chunk is the unit of work sent to a worker.
+Html values are sanitized here, as the ORM would on write.
+"""
+import re
+
+from datetime import date
+
+from odoo.tools import html_sanitize
+
+from .search_normalize import search_key
+
+LANGUAGES = {'en', 'ar', 'fr', 'es', 'de', 'it', 'pt', 'ru', 'ja', 'zh'}
+
+TEXT_FIELDS = ['edition', 'barcode', 'location', 'dewey_decimal', 'subject', 'keywords', 'description']
+
+
+class RecordError(ValueError):
+    """Rejection of a record; constraint names the library.book SQL constraint
+    the record would have violated, if any."""
+
+    def __init__(self, message, constraint=''):
+        super().__init__(message)
+        self.constraint = constraint
+
+
+def clean_isbn(isbn):
+    """ISBN without hyphens, spaces or any other formatting, upper-cased."""
+    return re.sub(r'[^0-9X]', '', (isbn or '').upper())
+
+
+def isbn_is_valid(isbn):
+    """Checksum validation of a cleaned ISBN-10 or ISBN-13."""
+    if len(isbn) == 10:
+        if not isbn[:9].isdigit() or not (isbn[9].isdigit() or isbn[9] == 'X'):
+            return False
+        check = sum(int(isbn[i]) * (10 - i) for i in range(9))
+        check = (11 - (check % 11)) % 11
+        return str(check) == isbn[9] or (check == 10 and isbn[9] == 'X')
+    if len(isbn) == 13:
+        if not isbn.isdigit():
+            return False
+        check = sum(int(isbn[i]) * (1 if i % 2 == 0 else 3) for i in range(12))
+        return int(isbn[12]) == (10 - (check % 10)) % 10
+    return False
+
+
+def to_isbn13(isbn):
+    """Canonical ISBN-13 of an ISBN-10 or ISBN-13 in any formatting, or '' if it is not valid."""
+    isbn = clean_isbn(isbn)
+    if not isbn_is_valid(isbn):
+        return ''
+    if len(isbn) == 13:
+        return isbn
+    body = '978' + isbn[:9]
+    check = sum(int(body[i]) * (1 if i % 2 == 0 else 3) for i in range(12))
+    return body + str((10 - (check % 10)) % 10)
+
+
+def name_key(name):
+    """Dedup key of an author, publisher or category name."""
+    return ' '.join((name or '').split()).casefold()
+
+
+def normalize_name(name):
+    """Collapse whitespace, and title-case names shouted or typed in lower case."""
+    name = ' '.join((name or '').split())
+    if name and (name.isupper() or name.islower()):
+        name = name.title()
+    return name
+
+
+def normalize_record(record, default_category=''):
+    """Book importer values of a raw record, or a ValueError with the rejection reason.
+
+    Keys starting with an underscore carry the names to resolve into ids
+    (_authors, _publisher, _category).
+    """
+    if record.get('_error'):
+        raise ValueError(record['_error'])
+    title = ' '.join(str(record.get('name') or record.get('title') or '').split())
+    if not title:
+        raise ValueError("Missing title")
+    isbn = clean_isbn(str(record.get('isbn') or ''))
+    if not isbn:
+        raise ValueError("Missing ISBN")
+    if not isbn_is_valid(isbn):
+        raise ValueError(f"Invalid ISBN {record.get('isbn')}")
+
+    authors = record.get('authors') or record.get('author') or []
+    if isinstance(authors, str):
+        authors = re.split(r'[;|]', authors)
+    authors = [normalize_name(author) for author in authors if author and str(author).strip()]
+    if not authors:
+        raise ValueError("Missing author")
+
+    category = ' '.join(str(record.get('category') or default_category or '').split())
+    if not category:
+        raise ValueError("Missing category")
+
+    total_copies = record.get('total_copies') or 1
+    try:
+        total_copies = int(total_copies)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid total copies {total_copies}")
+    if total_copies <= 0:
+        raise RecordError("Total copies must be positive", constraint='total_copies_positive')
+
+    vals = {
+        'name': title,
+        'isbn': isbn,
+        'isbn13': to_isbn13(isbn),
+        'search_key': search_key(title),
+        'total_copies': total_copies,
+        '_authors': list(dict.fromkeys(authors)),
+        '_publisher': normalize_name(str(record.get('publisher') or '')),
+        '_category': category,
+    }
+    for field_name in TEXT_FIELDS:
+        if record.get(field_name):
+            vals[field_name] = str(record[field_name]).strip()
+    # The bulk load writes the description with COPY, past the ORM's sanitizer of Html fields
+    if vals.get('description'):
+        vals['description'] = html_sanitize(vals['description'])
+    if record.get('language'):
+        language = str(record['language']).strip().lower()[:2]
+        if language not in LANGUAGES:
+            raise ValueError(f"Unsupported language {record['language']}")
+        vals['language'] = language
+    if record.get('publication_date'):
+        try:
+            vals['publication_date'] = date.fromisoformat(str(record['publication_date']).strip()[:10])
+        except ValueError:
+            raise ValueError(f"Invalid publication date {record['publication_date']}")
+    try:
+        if record.get('pages'):
+            vals['pages'] = int(record['pages'])
+        if record.get('price'):
+            vals['price'] = float(record['price'])
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid number: {e}")
+    return vals
+
+
+def normalize_chunk(rows, default_category=''):
+    """Normalize a chunk of (row number, record) pairs.
+
+    Returns ([(row number, vals), ...], [(row number, reason, violated constraint), ...]).
+    """
+    normalized = []
+    errors = []
+    for row_number, record in rows:
+        try:
+            normalized.append((row_number, normalize_record(record, default_category)))
+        except ValueError as e:
+            errors.append((row_number, str(e), getattr(e, 'constraint', '')))
+    return normalized, errors
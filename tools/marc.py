@@ -0,0 +1,234 @@
+"""Streaming readers for MARC21 bibliographic records.
+
+Both readers are generators: records are parsed one at a time from a binary
+stream, so a dump of any size is read in bounded memory.
+
+* iter_marc21 reads ISO 2709 binary files (.mrc)
+* iter_marcxml reads MARCXML files (MARC21 slim schema)
+
+marc_to_book maps a parsed record onto the values used by the book importer.
+"""
+import re
+import time
+from lxml import etree
+
+RECORD_TERMINATOR = b'\x1d'
+FIELD_TERMINATOR = b'\x1e'
+SUBFIELD_DELIMITER = b'\x1f'
+
+# MARC language codes (008/35-37 and 041$a) of the languages library.book supports
+LANGUAGE_CODES = {
+    'eng': 'en', 'ara': 'ar', 'fre': 'fr', 'fra': 'fr', 'spa': 'es', 'ger': 'de', 'deu': 'de',
+    'ita': 'it', 'por': 'pt', 'rus': 'ru', 'jpn': 'ja', 'chi': 'zh', 'zho': 'zh',
+}
+
+
+class MarcRecord:
+    """A parsed MARC record: control fields by tag, and data fields as
+    (tag, indicators, [(subfield code, value), ...]) in record order."""
+
+    __slots__ = ('leader', 'control_fields', 'data_fields')
+
+    def __init__(self, leader=''):
+        self.leader = leader
+        self.control_fields = {}
+        self.data_fields = []
+
+    def fields(self, *tags):
+        return [field for field in self.data_fields if field[0] in tags]
+
+    def subfields(self, tag, code):
+        return [value for field_tag, _, subfields in self.data_fields if field_tag == tag
+                for subfield_code, value in subfields if subfield_code == code]
+
+    def first(self, tag, code):
+        values = self.subfields(tag, code)
+        return values[0] if values else None
+
+
+def _decode(data, utf8):
+    # Leader/09 'a' means UTF-8; MARC-8 records are read as Latin-1, which keeps ASCII intact
+    return data.decode('utf-8', 'replace') if utf8 else data.decode('latin-1')
+
+
+def parse_marc21(raw):
+    """Parse one ISO 2709 record (bytes, including its record terminator)."""
+    leader = raw[:24].decode('ascii', 'replace')
+    utf8 = leader[9] == 'a'
+    base_address = int(leader[12:17])
+    record = MarcRecord(leader)
+    directory = raw[24:base_address - 1]
+    for offset in range(0, len(directory) - len(directory) % 12, 12):
+        entry = directory[offset:offset + 12]
+        tag = entry[:3].decode('ascii', 'replace')
+        length = int(entry[3:7])
+        start = base_address + int(entry[7:12])
+        data = raw[start:start + length].rstrip(FIELD_TERMINATOR)
+        if tag < '010':
+            record.control_fields[tag] = _decode(data, utf8)
+            continue
+        indicators = _decode(data[:2], utf8)
+        subfields = []
+        for chunk in data[2:].split(SUBFIELD_DELIMITER)[1:]:
+            if chunk:
+                subfields.append((_decode(chunk[:1], utf8), _decode(chunk[1:], utf8)))
+        record.data_fields.append((tag, indicators, subfields))
+    return record
+
+
+def iter_marc21(stream):
+    """Yield the MarcRecord of every ISO 2709 record of a binary stream."""
+    while True:
+        length = stream.read(5)
+        if not length or not length.strip():
+            return
+        if not length.isdigit():
+            raise ValueError(f"Invalid MARC record length {length!r}")
+        raw = length + stream.read(int(length) - 5)
+        yield parse_marc21(raw)
+
+
+def iter_marcxml(stream):
+    """Yield the MarcRecord of every <record> of a MARCXML stream.
+
+    Uploads are untrusted: entities are not resolved and nothing is fetched
+    from the network. Malformed XML raises ValueError.
+    """
+    records = etree.iterparse(stream, events=('end',), tag='{*}record', resolve_entities=False,
+                              no_network=True, load_dtd=False, huge_tree=False)
+    try:
+        for _, element in records:
+            record = MarcRecord()
+            for child in element:
+                if not isinstance(child.tag, str):
+                    continue  # comments and processing instructions
+                name = etree.QName(child).localname
+                if name == 'leader':
+                    record.leader = child.text or ''
+                elif name == 'controlfield':
+                    record.control_fields[child.get('tag')] = child.text or ''
+                elif name == 'datafield':
+                    indicators = (child.get('ind1') or ' ') + (child.get('ind2') or ' ')
+                    subfields = [(sub.get('code'), sub.text or '') for sub in child if isinstance(sub.tag, str)]
+                    record.data_fields.append((child.get('tag'), indicators, subfields))
+            # Release the parsed record and the records before it, so memory stays bounded:
+            # a cleared element left in its parent still costs one node per record
+            element.clear(keep_tail=True)
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+            yield record
+    except etree.XMLSyntaxError as e:
+        raise ValueError(f"Invalid MARCXML: {e}") from e
+
+
+def _strip_punctuation(value):
+    # ISBD punctuation ends most MARC values: "Title /", "Author,", "Publisher :"
+    return re.sub(r'[\s/:;,=.]+$', '', (value or '').strip())
+
+
+def marc_to_book(record):
+    """Map a MarcRecord onto book importer values.
+
+    020$a ISBN, 100/700$a authors, 245$a$b title, 260/264$b publisher and $c date,
+    082$a Dewey decimal, 250$a edition, 300$a pages, 650$a subject, 008 language.
+    """
+    values = {}
+
+    for isbn in record.subfields('020', 'a'):
+        # "0306406152 (pbk.)" - keep the number, drop the qualifier
+        match = re.match(r'[\dXx\- ]{10,17}', isbn.strip())
+        if match:
+            values['isbn'] = match.group(0).strip()
+            break
+
+    title = _strip_punctuation(record.first('245', 'a'))
+    subtitle = _strip_punctuation(record.first('245', 'b'))
+    if title:
+        values['name'] = f"{title}: {subtitle}" if subtitle else title
+
+    authors = [_strip_punctuation(name) for name in record.subfields('100', 'a') + record.subfields('700', 'a')]
+    values['authors'] = [name for name in authors if name]
+
+    # 264 with second indicator 1 is the publication statement; 260 is its older form
+    imprint = [field for field in record.fields('264') if field[1][1:] == '1'] or record.fields('260')
+    if imprint:
+        subfields = dict(reversed(imprint[0][2]))
+        if subfields.get('b'):
+            values['publisher'] = _strip_punctuation(subfields['b'])
+        year = re.search(r'\d{4}', subfields.get('c') or '')
+        if year:
+            values['publication_date'] = f"{year.group(0)}-01-01"
+
+    dewey = record.first('082', 'a')
+    if dewey:
+        values['dewey_decimal'] = dewey.replace('/', '').strip()
+    edition = record.first('250', 'a')
+    if edition:
+        values['edition'] = edition.strip().rstrip(' /:;,=')
+    pages = re.search(r'(\d+)\s*p', record.first('300', 'a') or '')
+    if pages:
+        values['pages'] = pages.group(1)
+    subjects = [_strip_punctuation(subject) for subject in record.subfields('650', 'a')]
+    if subjects:
+        values['subject'] = '; '.join(subjects)
+
+    fixed = record.control_fields.get('008', '')
+    language = LANGUAGE_CODES.get(fixed[35:38]) or LANGUAGE_CODES.get(record.first('041', 'a') or '')
+    if language:
+        values['language'] = language
+    return values
+
+
+def _build_sample_record(number):
+    """ISO 2709 record used by the benchmark below."""
+    fields = [
+        ('001', f"rec{number:08d}".encode()),
+        ('008', b'200101s2020    xxu           000 0 eng d'),
+        ('020', b'  \x1fa0306406152 (pbk.)'),
+        ('082', b'04\x1fa530.1/2\x1f223'),
+        ('100', b'1 \x1faDoe, Jane,\x1fd1970-'),
+        ('245', b'10\x1faA sample title :\x1fba subtitle /\x1fcJane Doe.'),
+        ('250', b'  \x1fa2nd ed.'),
+        ('264', b' 1\x1faNew York :\x1fbSample Press,\x1fc2020.'),
+        ('300', b'  \x1fa350 p. ;\x1fc24 cm.'),
+        ('650', b' 0\x1faPhysics.'),
+        ('700', b'1 \x1faRoe, Richard.'),
+    ]
+    directory = b''
+    data = b''
+    for tag, value in fields:
+        value += FIELD_TERMINATOR
+        directory += tag.encode() + b'%04d%05d' % (len(value), len(data))
+        data += value
+    base_address = 24 + len(directory) + 1
+    length = base_address + len(data) + 1
+    leader = b'%05dnam a22%05d i 4500' % (length, base_address)
+    return leader + directory + FIELD_TERMINATOR + data + RECORD_TERMINATOR
+
+
+def benchmark(count=100000):
+    """Time record-level parsing and mapping of `count` synthetic ISO 2709 records."""
+    import io
+    payload = b''.join(_build_sample_record(number) for number in range(count))
+    started = time.perf_counter()
+    parsed = sum(1 for _ in iter_marc21(io.BytesIO(payload)))
+    parse_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    for record in iter_marc21(io.BytesIO(payload)):
+        marc_to_book(record)
+    total_seconds = time.perf_counter() - started
+    return {
+        'records': parsed,
+        'megabytes': len(payload) / 1e6,
+        'parse_records_per_second': parsed / parse_seconds,
+        'parse_and_map_records_per_second': parsed / total_seconds,
+    }
+
+
+if __name__ == '__main__':
+    # python3 tools/marc.py [record count]
+    import sys
+    result = benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
+    print(f"{result['records']} records ({result['megabytes']:.1f} MB): "
+          f"{result['parse_records_per_second']:,.0f} records/s parsed, "
+          f"{result['parse_and_map_records_per_second']:,.0f} records/s parsed and mapped")
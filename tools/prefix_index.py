@@ -0,0 +1,228 @@
+"""In-memory prefix index for desk autocomplete.
+
+Every indexed record contributes a few keys: the words of its texts (title,
+name) and its codes whole (ISBN, barcode, member ID, email). The keys of all
+records are kept in one sorted list, next to an array of record ids, so the
+records with a key starting with a prefix are a contiguous slice found by
+bisection. A term of several words is looked up by its longest word; the
+other words must prefix some key of the same record.
+
+The index only answers from memory: loading and refreshing its entries from
+the database is left to the caller.
+"""
+import re
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+try:
+    from .search_normalize import search_key
+except ImportError:
+    # Run as a script for the benchmark
+    from search_normalize import search_key
+
+_SEPARATORS = re.compile(r'[\W_]+')
+_CODE_SEPARATORS = re.compile(r'[\s\-]+')
+
+
+def normalize(text):
+    """Search key of the text (see search_normalize), with punctuation turned into spaces."""
+    return _SEPARATORS.sub(' ', search_key(text)).strip()
+
+
+def normalize_code(code):
+    """Case-folded code without spaces or hyphens (ISBNs, barcodes, IDs, emails)."""
+    return _CODE_SEPARATORS.sub('', (code or '').casefold())
+
+
+def make_keys(texts=(), codes=()):
+    """Sorted unique keys of a record: the words of `texts` and the whole `codes`."""
+    keys = set()
+    for text in texts:
+        keys.update(normalize(text).split())
+    for code in codes:
+        code = normalize_code(code)
+        if code:
+            keys.add(code)
+    # Common words are shared by thousands of records: one string object each
+    return tuple(sorted(sys.intern(key) for key in keys))
+
+
+class PrefixIndex:
+    """Sorted arrays of (key, record id) with a payload per record.
+
+    Payloads are whatever the caller wants returned by search(), ideally
+    tuples: the index holds one per record.
+
+    Inserting into arrays of millions of keys moves them all, so updates go to
+    a small delta index searched alongside the main one; rows of the main index
+    left stale by an update are skipped at search time. The main index is
+    rebuilt once the delta grows past `rebuild_ratio` of its size.
+    """
+
+    rebuild_ratio = 0.05
+    # Candidates examined per search at most, for terms matched by too many records
+    max_scan = 5000
+
+    def __init__(self):
+        self._keys = []
+        self._ids = array('l')
+        self._delta_keys = []
+        self._delta_ids = array('l')
+        self._changes = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def key_count(self):
+        return len(self._keys) + len(self._delta_keys)
+
+    def build(self, entries):
+        """Replace the content of the index with `entries`: (record id, keys, payload)."""
+        records = {record_id: (keys, payload) for record_id, keys, payload in entries}
+        keys, ids = self._sorted_arrays(records)
+        with self._lock:
+            self._entries = records
+            self._keys = keys
+            self._ids = ids
+            self._delta_keys = []
+            self._delta_ids = array('l')
+            self._changes = 0
+
+    @staticmethod
+    def _sorted_arrays(records):
+        pairs = sorted((key, record_id) for record_id, (keys, _) in records.items() for key in keys)
+        return [key for key, _ in pairs], array('l', (record_id for _, record_id in pairs))
+
+    def update(self, entries=(), removed_ids=()):
+        """Insert or replace `entries` (record id, keys, payload), drop `removed_ids`."""
+        with self._lock:
+            for record_id in removed_ids:
+                if self._entries.pop(record_id, None) is not None:
+                    self._changes += 1
+            for record_id, keys, payload in entries:
+                self._entries[record_id] = (keys, payload)
+                self._changes += 1
+                for key in keys:
+                    position = bisect_left(self._delta_keys, key)
+                    self._delta_keys.insert(position, key)
+                    self._delta_ids.insert(position, record_id)
+            if self._changes <= max(len(self._entries) * self.rebuild_ratio, 1000):
+                return
+            records = dict(self._entries)
+        self.build((record_id, keys, payload) for record_id, (keys, payload) in records.items())
+
+    def search(self, term, limit=10):
+        """Payloads of up to `limit` records matching every word of `term` by prefix,
+        or whose code starts with `term`."""
+        words = normalize(term).split()
+        code = normalize_code(term)
+        found = {}
+        with self._lock:
+            for keys, ids in ((self._keys, self._ids), (self._delta_keys, self._delta_ids)):
+                if words:
+                    probe = max(words, key=len)
+                    self._scan(keys, ids, probe, words, limit, found)
+                if code and code not in words:
+                    self._scan(keys, ids, code, [code], limit, found)
+        return list(found.values())[:limit]
+
+    def _scan(self, keys, ids, prefix, words, limit, found):
+        position = bisect_left(keys, prefix)
+        end = min(len(keys), position + self.max_scan)
+        while position < end and len(found) < limit and keys[position].startswith(prefix):
+            record_id = ids[position]
+            position += 1
+            entry = self._entries.get(record_id)
+            if entry is None or record_id in found:
+                continue
+            # Also rejects rows of a record updated since, whose keys no longer match
+            record_keys, payload = entry
+            if all(any(key.startswith(word) for key in record_keys) for word in words):
+                found[record_id] = payload
+
+
+_SAMPLE_WORDS = (
+    'history of the modern world science art war peace garden river city night '
+    'light shadow introduction guide complete handbook principles theory practice '
+    'ancient empire revolution ocean mountain journey stories poems letters life '
+    'death love time secret island kingdom economics physics chemistry biology '
+    'mathematics philosophy language music painting architecture cooking travel '
+    'médecine éducation société géographie naturaleza música'
+).split()
+
+
+def benchmark(count=500000, queries=2000):
+    """Time building an index of `count` synthetic books, measure its memory
+    and the latency of prefix searches."""
+    import random
+    import tracemalloc
+    rng = random.Random(42)
+    rows = []
+    for number in range(count):
+        title = ' '.join(rng.choice(_SAMPLE_WORDS) for _ in range(rng.randint(2, 6)))
+        isbn = f"978{number:010d}"
+        rows.append((number + 1, title, isbn))
+
+    def entries():
+        return ((record_id, make_keys([title], [isbn]), (record_id, title, isbn))
+                for record_id, title, isbn in rows)
+
+    started = time.perf_counter()
+    index = PrefixIndex()
+    index.build(entries())
+    build_seconds = time.perf_counter() - started
+    # Memory is measured on a second build: tracing allocations slows it down
+    del index
+    tracemalloc.start()
+    index = PrefixIndex()
+    index.build(entries())
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    terms = []
+    for _ in range(queries):
+        _, title, isbn = rows[rng.randrange(count)]
+        words = title.split()
+        choice = rng.random()
+        if choice < 0.4:
+            terms.append(words[0][:rng.randint(1, len(words[0]))])
+        elif choice < 0.8:
+            terms.append(' '.join(words[:2])[:-1])
+        else:
+            terms.append(isbn[:rng.randint(4, 13)])
+    started = time.perf_counter()
+    latencies = []
+    for term in terms:
+        query_started = time.perf_counter()
+        index.search(term)
+        latencies.append(time.perf_counter() - query_started)
+    latencies.sort()
+
+    started = time.perf_counter()
+    index.update([(record_id, make_keys([title + ' revised'], [isbn]), (record_id, title, isbn))
+                  for record_id, title, isbn in rows[:1000]])
+    update_seconds = time.perf_counter() - started
+    return {
+        'records': len(index),
+        'keys': index.key_count,
+        'megabytes': memory / 1e6,
+        'build_seconds': build_seconds,
+        'search_median_ms': latencies[len(latencies) // 2] * 1000,
+        'search_p99_ms': latencies[int(len(latencies) * 0.99)] * 1000,
+        'update_1000_seconds': update_seconds,
+    }
+
+
+if __name__ == '__main__':
+    # python3 tools/prefix_index.py [record count]
+    result = benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 500000)
+    print(f"{result['records']} records, {result['keys']} keys ({result['megabytes']:.0f} MB): "
+          f"built in {result['build_seconds']:.1f}s, "
+          f"search median {result['search_median_ms']:.2f} ms, p99 {result['search_p99_ms']:.2f} ms, "
+          f"1000 updates in {result['update_1000_seconds']:.2f}s")
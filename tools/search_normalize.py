@@ -0,0 +1,36 @@
+"""Search keys of catalog texts, for accent- and script-insensitive matching.
+
+search_key folds the variations a reader does not type consistently:
+
+* case, with full Unicode case folding (Straße -> strasse)
+* diacritics, including Arabic short vowels and hamza marks (é -> e, أ -> ا)
+* Arabic letter variants (ى -> ي, ة -> ه, Persian ک and ی) and the tatweel
+* compatibility forms: full-width Latin, half-width katakana, ligatures
+* Arabic-Indic digits (١٢٣ -> 123)
+
+Japanese voiced kana keep their voicing marks (が stays が). The same function
+builds the stored keys and the searched terms, so both always agree.
+"""
+import unicodedata
+
+# Combining marks kept: kana voicing marks distinguish different syllables
+_KEPT_MARKS = {'゙', '゚'}
+
+_LETTER_VARIANTS = str.maketrans({
+    'ٱ': 'ا',  # alef wasla
+    'ى': 'ي',  # alef maksura
+    'ة': 'ه',  # teh marbuta
+    'ک': 'ك',  # Persian kaf
+    'ی': 'ي',  # Persian yeh
+    'ـ': None,  # tatweel
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},
+    **{chr(0x06F0 + digit): str(digit) for digit in range(10)},
+})
+
+
+def search_key(text):
+    """Folded form of `text` used to store and query search keys."""
+    text = unicodedata.normalize('NFKD', (text or '').casefold())
+    text = ''.join(char for char in text if char in _KEPT_MARKS or not unicodedata.combining(char))
+    text = unicodedata.normalize('NFC', text).translate(_LETTER_VARIANTS)
+    return ' '.join(text.split())
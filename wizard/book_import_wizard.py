@@ -1,17 +1,596 @@
 from odoo import models, fields, api
 from odoo.exceptions import UserError
+from odoo.http import request
+import base64
+import csv
+import io
+import json
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from ..tools import import_normalize, marc
+from ..tools.import_normalize import name_key
+
+_logger = logging.getLogger(__name__)
+
+# library_book columns filled from the staging table of a bulk load
+_STAGED_FIELDS = [
+    'name', 'isbn', 'isbn13', 'search_key', 'category_id', 'publisher_id', 'total_copies', 'language', 'edition', 'barcode',
+    'location', 'dewey_decimal', 'subject', 'keywords', 'description', 'publication_date', 'pages', 'price',
+]
+
+
+class _Base64Reader(io.RawIOBase):
+    """Binary stream decoding a base64 payload a few kilobytes at a time"""
+
+    def __init__(self, encoded, chunk_size=65536):
+        self._encoded = encoded
+        self._position = 0
+        self._chunk_size = chunk_size - chunk_size % 4  # whole base64 quanta only
+        self._buffer = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        while not self._buffer and self._position < len(self._encoded):
+            encoded_chunk = self._encoded[self._position:self._position + self._chunk_size]
+            self._position += self._chunk_size
+            self._buffer = base64.b64decode(encoded_chunk)
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
 
 class BookImportWizard(models.TransientModel):
     _name = 'book.import.wizard'
     _description = 'Import Books Wizard'
 
-    import_file = fields.Binary('Import File', required=True)
+    # Number of rows validated and created together
+    _chunk_size = 1000
+
+    import_file = fields.Binary('Import File', required=True, attachment=True)
     filename = fields.Char('Filename')
+    file_format = fields.Selection([
+        ('csv', 'CSV'),
+        ('jsonl', 'JSON Lines'),
+        ('marc', 'MARC21 (ISO 2709)'),
+        ('marcxml', 'MARCXML'),
+    ], 'File Format', compute='_compute_file_format', store=True, readonly=False, required=True)
+    csv_delimiter = fields.Char('CSV Delimiter', default=',', size=1)
+    # Used for records without a category, e.g. every MARC record
+    default_category_id = fields.Many2one('library.category', 'Default Category')
+
+    # Bulk loads are queued for a cron job, which normalizes in worker processes and writes
+    # through COPY and set-based SQL, bypassing per-record ORM logic such as chatter tracking
+    import_mode = fields.Selection([
+        ('standard', 'Standard'),
+        ('bulk', 'Bulk Load'),
+    ], 'Import Mode', default='standard', required=True)
+    max_workers = fields.Integer('Normalization Workers',
+                                 help='Number of worker processes, 0 for the maximum set in the library configuration.')
+
+    state = fields.Selection([
+        ('upload', 'Upload'),
+        ('queued', 'Queued'),
+        ('done', 'Done'),
+    ], default='upload')
+    created_count = fields.Integer('Books Created', readonly=True)
+    error_count = fields.Integer('Rows Rejected', readonly=True)
+    error_log = fields.Text('Row Errors', readonly=True)
+
+    # Dry run - classifies every row and produces a conflict report, nothing is imported
+    dry_run = fields.Boolean('Dry Run', help='Check the file against the catalog without importing anything.')
+    new_count = fields.Integer('New Books', readonly=True)
+    existing_count = fields.Integer('Existing ISBNs', readonly=True)
+    duplicate_count = fields.Integer('Duplicate ISBNs in File', readonly=True)
+    new_author_count = fields.Integer('Authors to Create', readonly=True)
+    new_publisher_count = fields.Integer('Publishers to Create', readonly=True)
+    report_file = fields.Binary('Conflict Report', readonly=True, attachment=True)
+    report_filename = fields.Char('Report Filename')
+
+    # Guess the format from the file extension, CSV by default
+    @api.depends('filename')
+    def _compute_file_format(self):
+        for wizard in self:
+            filename = (wizard.filename or '').lower()
+            if filename.endswith(('.jsonl', '.ndjson', '.json')):
+                wizard.file_format = 'jsonl'
+            elif filename.endswith(('.mrc', '.marc', '.iso2709')):
+                wizard.file_format = 'marc'
+            elif filename.endswith('.xml'):
+                wizard.file_format = 'marcxml'
+            else:
+                wizard.file_format = 'csv'
 
     def action_import_books(self):
-        # Implement your import logic here
+        self.ensure_one()
         if not self.import_file:
             raise UserError('Please upload a file to import.')
-        # Example: parse CSV and create books
-        # ... your import logic ...
-        return {'type': 'ir.actions.act_window_close'}
\ No newline at end of file
+        if self.import_mode == 'bulk' and not self.dry_run:
+            self.write({'state': 'queued'})
+            self.env.ref('library_management.ir_cron_library_book_import')._trigger()
+            return self._reopen()
+        return self._run_import()
+
+    @api.model
+    def _cron_process_bulk_imports(self):
+        """Cron job to run the queued bulk imports"""
+        for wizard in self.search([('state', '=', 'queued')], order='id'):
+            try:
+                wizard._run_import()
+                self.env.cr.commit()
+            except Exception as e:
+                self.env.cr.rollback()
+                _logger.exception("Bulk book import %s failed", wizard.id)
+                wizard.write({'state': 'done', 'error_log': f"Import failed: {e}"})
+                self.env.cr.commit()
+
+    def _run_import(self):
+        caches = self._load_import_caches()
+        stats = {'created': 0}
+        errors = []
+        with self._open_import_file() as stream:
+            chunks = self._iter_normalized_chunks(self._iter_chunks(self._iter_records(stream)), errors)
+            if self.dry_run:
+                return self._dry_run(chunks, caches, errors)
+            if self.import_mode == 'bulk':
+                self._bulk_load(chunks, caches, stats, errors)
+            else:
+                for normalized in chunks:
+                    self._import_chunk(normalized, caches, stats, errors)
+
+        errors.sort()
+        self.write({
+            'state': 'done',
+            'created_count': stats['created'],
+            'error_count': len(errors),
+            'error_log': '\n'.join(f"Row {row}: {message}" for row, _, _, message in errors) or False,
+        })
+        return self._reopen()
+
+    def _reopen(self):
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    # -----------------------------
+    # READING
+    # -----------------------------
+
+    # Opens the upload as a binary stream - straight from the filestore when possible,
+    # otherwise by decoding the stored base64 value incrementally
+    def _open_import_file(self):
+        attachment = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', 'import_file'),
+            ('res_id', '=', self.id),
+        ], limit=1)
+        if attachment.store_fname:
+            return open(attachment._full_path(attachment.store_fname), 'rb')
+        return io.BufferedReader(_Base64Reader(self.with_context(bin_size=False).import_file))
+
+    # Yields (row number, record dict) lazily, whatever the file format
+    # MARC rows are numbered by record position in the file
+    def _iter_records(self, stream):
+        if self.file_format in ['marc', 'marcxml']:
+            reader = marc.iter_marc21 if self.file_format == 'marc' else marc.iter_marcxml
+            records = reader(stream)
+            row_number = 0
+            while True:
+                row_number += 1
+                try:
+                    record = next(records)
+                except StopIteration:
+                    return
+                except ValueError as e:
+                    # A corrupt record breaks the framing of the rest of the file
+                    yield row_number, {'_error': f"Unreadable MARC record: {e}"}
+                    return
+                yield row_number, marc.marc_to_book(record)
+            return
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        if self.file_format == 'jsonl':
+            for row_number, line in enumerate(text, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield row_number, {'_error': f"Invalid JSON: {e}"}
+                    continue
+                if not isinstance(record, dict):
+                    yield row_number, {'_error': "Not a JSON object"}
+                    continue
+                yield row_number, record
+        else:
+            reader = csv.DictReader(text, delimiter=self.csv_delimiter or ',')
+            # Row 1 is the header line
+            for row_number, row in enumerate(reader, start=2):
+                yield row_number, {(key or '').strip().lower(): value for key, value in row.items()}
+
+    def _iter_chunks(self, records):
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= self._chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    # -----------------------------
+    # CACHES
+    # -----------------------------
+
+    # Existing ISBNs, authors, publishers and categories, loaded once per import
+    # Names are matched case-insensitively, ISBNs by their canonical ISBN-13
+    def _load_import_caches(self):
+        self.env.flush_all()
+        cr = self.env.cr
+        cr.execute("SELECT isbn13 FROM library_book WHERE isbn13 IS NOT NULL")
+        isbns = {row[0] for row in cr.fetchall()}
+        cr.execute("SELECT id, name FROM library_author ORDER BY id")
+        authors = {}
+        for author_id, name in cr.fetchall():
+            authors.setdefault(name_key(name), author_id)
+        cr.execute("SELECT id, name FROM library_publisher ORDER BY id")
+        publishers = {}
+        for publisher_id, name in cr.fetchall():
+            publishers.setdefault(name_key(name), publisher_id)
+        cr.execute("SELECT id, name, complete_name FROM library_category ORDER BY id")
+        categories = {}
+        category_leaves = {}
+        for category_id, name, complete_name in cr.fetchall():
+            categories[name_key(complete_name or name)] = category_id
+            self._add_category_leaf(category_leaves, name, category_id)
+        return {
+            'isbns': isbns,
+            'file_isbns': set(),
+            'authors': authors,
+            'publishers': publishers,
+            'categories': categories,
+            'category_leaves': category_leaves,
+        }
+
+    # Categories by their own name, for rows giving "Physics" rather than "Science / Physics"
+    # A name shared by several categories maps to False: it cannot tell them apart
+    @staticmethod
+    def _add_category_leaf(category_leaves, name, category_id):
+        key = name_key(name)
+        category_leaves[key] = False if key in category_leaves else category_id
+
+    # -----------------------------
+    # NORMALIZATION
+    # -----------------------------
+
+    # Normalizes and validates chunks of raw records - in worker processes for bulk loads run
+    # by the cron, while this process keeps reading the file and writing to the database
+    # At most two chunks per worker are in flight, so memory stays bounded
+    # Within an HTTP request rows are normalized in-process: a forked HTTP worker would inherit
+    # its sockets, threads and locks, and escape the server's memory and time limits
+    def _iter_normalized_chunks(self, chunks, errors):
+        default_category = self.default_category_id.complete_name or ''
+        max_workers = self.env['library.config'].get_config().import_max_workers
+        workers = min(self.max_workers or max_workers, max_workers)
+        if self.import_mode != 'bulk' or request or workers <= 1:
+            for chunk in chunks:
+                normalized, chunk_errors = import_normalize.normalize_chunk(chunk, default_category)
+                errors.extend((row, 'invalid', constraint, message) for row, message, constraint in chunk_errors)
+                yield normalized
+            return
+        # Workers are forked: they only run pure functions and never use the inherited cursor
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as executor:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(import_normalize.normalize_chunk, chunk, default_category))
+                if len(pending) >= workers * 2:
+                    normalized, chunk_errors = pending.popleft().result()
+                    errors.extend((row, 'invalid', constraint, message) for row, message, constraint in chunk_errors)
+                    yield normalized
+            while pending:
+                normalized, chunk_errors = pending.popleft().result()
+                errors.extend((row, 'invalid', constraint, message) for row, message, constraint in chunk_errors)
+                yield normalized
+
+    # Drops rows whose ISBN is in the catalog already or earlier in the file,
+    # and reserves the ISBNs of the others
+    def _reserve_isbns(self, normalized, caches, errors):
+        prepared = []
+        for row_number, vals in normalized:
+            if vals['isbn13'] in caches['file_isbns']:
+                errors.append((row_number, 'duplicate', 'isbn13_unique', f"ISBN {vals['isbn']} appears earlier in the file"))
+                continue
+            caches['file_isbns'].add(vals['isbn13'])
+            if vals['isbn13'] in caches['isbns']:
+                errors.append((row_number, 'existing', 'isbn13_unique', f"ISBN {vals['isbn']} already exists"))
+                continue
+            prepared.append((row_number, vals))
+        return prepared
+
+    # Creates the missing authors, publishers and categories of a chunk in bulk
+    # Rows whose category name matches several categories are reported and left out
+    def _resolve_names(self, prepared, caches, errors):
+        resolved = []
+        for row_number, vals in prepared:
+            if self._is_ambiguous_category(vals['_category'], caches):
+                caches['file_isbns'].discard(vals['isbn13'])
+                errors.append((row_number, 'invalid', 'category_id',
+                               f"Category \"{vals['_category']}\" matches several categories: give its full path"))
+            else:
+                resolved.append((row_number, vals))
+        self._create_missing(
+            'library.author', caches['authors'],
+            {name for _, vals in resolved for name in vals['_authors']})
+        self._create_missing(
+            'library.publisher', caches['publishers'],
+            {vals['_publisher'] for _, vals in resolved if vals['_publisher']})
+        for _, vals in resolved:
+            self._resolve_category(vals['_category'], caches)
+        return resolved
+
+    # Book values of a normalized row, with names replaced by ids
+    def _book_vals(self, vals, caches):
+        book_vals = {key: value for key, value in vals.items() if not key.startswith('_')}
+        book_vals['author_ids'] = list(dict.fromkeys(caches['authors'][name_key(name)] for name in vals['_authors']))
+        if vals['_publisher']:
+            book_vals['publisher_id'] = caches['publishers'][name_key(vals['_publisher'])]
+        book_vals['category_id'] = caches['categories'][name_key(vals['_category'])]
+        return book_vals
+
+    # -----------------------------
+    # IMPORT
+    # -----------------------------
+
+    # Creates all the books of a normalized chunk with a single multi-create
+    def _import_chunk(self, normalized, caches, stats, errors):
+        prepared = self._reserve_isbns(normalized, caches, errors)
+        if not prepared:
+            return
+        prepared = self._resolve_names(prepared, caches, errors)
+        if not prepared:
+            return
+        vals_list = []
+        for _, vals in prepared:
+            book_vals = self._book_vals(vals, caches)
+            book_vals['author_ids'] = [(6, 0, book_vals['author_ids'])]
+            vals_list.append(book_vals)
+
+        Book = self.env['library.book'].with_context(
+            tracking_disable=True, mail_create_nolog=True, mail_create_nosubscribe=True)
+        try:
+            with self.env.cr.savepoint():
+                Book.create(vals_list)
+            stats['created'] += len(vals_list)
+        except Exception:
+            # Something in the chunk violates a constraint - retry row by row to find it
+            for (row_number, _), book_vals in zip(prepared, vals_list):
+                try:
+                    with self.env.cr.savepoint():
+                        Book.create(book_vals)
+                    stats['created'] += 1
+                except Exception as e:
+                    errors.append((row_number, 'failed', '', str(e)))
+        self.env.invalidate_all()
+
+    # -----------------------------
+    # DRY RUN
+    # -----------------------------
+
+    # Classifies every row against the preloaded hash sets without writing to the catalog,
+    # and attaches the outcome as a CSV report
+    def _dry_run(self, chunks, caches, errors):
+        report_rows = []
+        new_authors = set()
+        new_publishers = set()
+        for normalized in chunks:
+            for row_number, vals in self._reserve_isbns(normalized, caches, errors):
+                if self._is_ambiguous_category(vals['_category'], caches):
+                    errors.append((row_number, 'invalid', 'category_id',
+                                   f"Category \"{vals['_category']}\" matches several categories: give its full path"))
+                    continue
+                row_authors = [name for name in vals['_authors'] if name_key(name) not in caches['authors']]
+                row_publisher = vals['_publisher'] if vals['_publisher'] and name_key(vals['_publisher']) not in caches['publishers'] else ''
+                new_authors.update(name_key(name) for name in row_authors)
+                if row_publisher:
+                    new_publishers.add(name_key(row_publisher))
+                report_rows.append((row_number, 'new', '', vals['isbn'], vals['name'], '; '.join(row_authors), row_publisher, ''))
+        report_rows.extend((row, status, constraint, '', '', '', '', message) for row, status, constraint, message in errors)
+        report_rows.sort()
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(['Row', 'Outcome', 'Violated Constraint', 'ISBN', 'Title', 'New Authors', 'New Publisher', 'Message'])
+        writer.writerows(report_rows)
+        outcomes = [row[1] for row in report_rows]
+        self.write({
+            'state': 'done',
+            'created_count': 0,
+            'new_count': outcomes.count('new'),
+            'existing_count': outcomes.count('existing'),
+            'duplicate_count': outcomes.count('duplicate'),
+            'error_count': outcomes.count('invalid'),
+            'new_author_count': len(new_authors),
+            'new_publisher_count': len(new_publishers),
+            'error_log': False,
+            'report_file': base64.b64encode(buffer.getvalue().encode('utf-8')),
+            'report_filename': f"{(self.filename or 'import').rsplit('.', 1)[0]}_dry_run.csv",
+        })
+        return self._reopen()
+
+    # -----------------------------
+    # BULK LOAD
+    # -----------------------------
+
+    # Stages every normalized chunk into a temporary table with COPY, then merges
+    # the whole file into library_book with set-based SQL
+    def _bulk_load(self, chunks, caches, stats, errors):
+        cr = self.env.cr
+        columns = ['row_number'] + _STAGED_FIELDS + ['author_ids']
+        cr.execute("""
+            CREATE TEMP TABLE library_book_import_stage (
+                row_number integer,
+                name varchar,
+                isbn varchar,
+                isbn13 varchar,
+                search_key varchar,
+                category_id integer,
+                publisher_id integer,
+                total_copies integer,
+                language varchar,
+                edition varchar,
+                barcode varchar,
+                location varchar,
+                dewey_decimal varchar,
+                subject varchar,
+                keywords varchar,
+                description text,
+                publication_date date,
+                pages integer,
+                price numeric,
+                author_ids integer[]
+            ) ON COMMIT DROP
+        """)
+        for normalized in chunks:
+            prepared = self._reserve_isbns(normalized, caches, errors)
+            if not prepared:
+                continue
+            prepared = self._resolve_names(prepared, caches, errors)
+            if not prepared:
+                continue
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row_number, vals in prepared:
+                book_vals = self._book_vals(vals, caches)
+                writer.writerow(
+                    [row_number]
+                    + [book_vals.get(field_name) for field_name in _STAGED_FIELDS]
+                    + ['{%s}' % ','.join(map(str, book_vals['author_ids']))]
+                )
+            buffer.seek(0)
+            cr.copy_expert(
+                f"COPY library_book_import_stage ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                buffer)
+        cr.execute("CREATE INDEX ON library_book_import_stage (isbn13)")
+        self._merge_staged_books(stats, errors)
+
+    def _merge_staged_books(self, stats, errors):
+        cr = self.env.cr
+        self.env.flush_all()
+        params = {
+            'uid': self.env.uid,
+            'now': fields.Datetime.now(),
+            'today': fields.Date.today(),
+            'currency_id': self.env.company.currency_id.id,
+        }
+        staged = ', '.join(f"s.{field_name}" for field_name in _STAGED_FIELDS if field_name != 'language')
+        cr.execute(f"""
+            INSERT INTO library_book (
+                {', '.join(field_name for field_name in _STAGED_FIELDS if field_name != 'language')},
+                language, available_copies, state, active, currency_id, acquisition_date,
+                average_rating, review_count, popularity_score,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT {staged},
+                   COALESCE(s.language, 'en'), s.total_copies, 'available', TRUE, %(currency_id)s, %(today)s,
+                   0.0, 0, 0.0,
+                   %(uid)s, %(now)s, %(uid)s, %(now)s
+              FROM library_book_import_stage s
+          ORDER BY s.row_number
+                ON CONFLICT DO NOTHING
+         RETURNING id
+        """, params)
+        book_ids = [row[0] for row in cr.fetchall()]
+        stats['created'] += len(book_ids)
+
+        # Every staged row left out by ON CONFLICT is reported, with the constraint it hit:
+        # mostly ISBNs inserted by someone else while the file was loading
+        cr.execute("""
+            SELECT s.row_number, s.isbn,
+                   EXISTS(SELECT 1 FROM library_book b WHERE b.isbn13 = s.isbn13),
+                   EXISTS(SELECT 1 FROM library_book b WHERE b.isbn = s.isbn)
+              FROM library_book_import_stage s
+             WHERE NOT EXISTS(SELECT 1 FROM library_book b WHERE b.isbn13 = s.isbn13 AND b.id = ANY(%s))
+        """, [book_ids])
+        for row_number, isbn, isbn13_taken, isbn_taken in cr.fetchall():
+            if isbn13_taken:
+                errors.append((row_number, 'existing', 'isbn13_unique', f"ISBN {isbn} already exists"))
+            elif isbn_taken:
+                errors.append((row_number, 'existing', 'isbn_unique', f"ISBN {isbn} already exists"))
+            else:
+                errors.append((row_number, 'failed', '', f"ISBN {isbn} was not inserted: it conflicts with an existing book"))
+
+        cr.execute("""
+            INSERT INTO library_book_author_rel (book_id, author_id)
+            SELECT DISTINCT b.id, a.author_id
+              FROM library_book_import_stage s
+              JOIN library_book b ON b.isbn13 = s.isbn13
+             CROSS JOIN unnest(s.author_ids) AS a(author_id)
+             WHERE b.id = ANY(%s)
+         RETURNING author_id
+        """, [book_ids])
+        author_ids = list({row[0] for row in cr.fetchall()})
+
+        # Stored fields depending on the new rows are recomputed once, for the whole load
+        self.env.invalidate_all()
+        authors = self.env['library.author'].browse(author_ids)
+        self.env.add_to_compute(authors._fields['book_count'], authors)
+        self.env.flush_all()
+
+        # The new ISBNs and barcodes become scannable, and the copies of the new books are created
+        for start in range(0, len(book_ids), 5000):
+            books = self.env['library.book'].browse(book_ids[start:start + 5000])
+            self.env['library.scan.identifier']._sync_records(books)
+            books._generate_copies()
+            books.invalidate_recordset()
+
+    # -----------------------------
+    # NAME RESOLUTION
+    # -----------------------------
+
+    # Creates the records of names missing from a cache in one call, and caches their ids
+    def _create_missing(self, model_name, cache, names):
+        missing = {}
+        for name in names:
+            key = name_key(name)
+            if key not in cache and key not in missing:
+                missing[key] = name
+        if missing:
+            records = self.env[model_name].create([{'name': name} for name in missing.values()])
+            for key, record in zip(missing, records):
+                cache[key] = record.id
+
+    # A bare category name matching no complete name but the names of several categories
+    def _is_ambiguous_category(self, path, caches):
+        key = name_key(path)
+        return key not in caches['categories'] and caches['category_leaves'].get(key) is False
+
+    # Categories are given by name or complete name ("Science / Physics") - missing levels are created
+    # A bare name is also matched against the names of existing subcategories ("Physics")
+    def _resolve_category(self, path, caches):
+        cache = caches['categories']
+        key = name_key(path)
+        if key in cache:
+            return cache[key]
+        if '/' not in path and caches['category_leaves'].get(key):
+            cache[key] = caches['category_leaves'][key]
+            return cache[key]
+        parent_id = False
+        parts = [part.strip() for part in path.split('/') if part.strip()]
+        for depth in range(len(parts)):
+            level_key = name_key(' / '.join(parts[:depth + 1]))
+            if level_key not in cache:
+                category = self.env['library.category'].create({'name': parts[depth], 'parent_id': parent_id})
+                cache[level_key] = category.id
+                self._add_category_leaf(caches['category_leaves'], parts[depth], category.id)
+            parent_id = cache[level_key]
+        cache[key] = parent_id
+        return parent_id
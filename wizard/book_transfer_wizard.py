@@ -1,19 +1,61 @@
 from odoo import models, fields, api
 from odoo.exceptions import UserError
+from markupsafe import Markup
 
 class BookTransferWizard(models.TransientModel):
     _name = 'book.transfer.wizard'
     _description = 'Book Transfer Wizard'
 
-    book_id = fields.Many2one('library.book', 'Book', required=True)
-    from_location = fields.Char('From Location', required=True)
-    to_location = fields.Char('To Location', required=True)
+    # Moves either the selected books or everything shelved under a location (a floor, a range...)
+    transfer_mode = fields.Selection([
+        ('books', 'Selected Books'),
+        ('location', 'Whole Location'),
+    ], 'Transfer', default='books', required=True)
+    book_ids = fields.Many2many('library.book', string='Books')
+    source_location_id = fields.Many2one('library.location', 'From Location')
+    include_sublocations = fields.Boolean('Include Sub-Locations', default=True)
+    location_id = fields.Many2one('library.location', 'To Location', required=True)
     transfer_date = fields.Date('Transfer Date', default=fields.Date.today, required=True)
+    note = fields.Char('Reason')
 
+    @api.model
+    def default_get(self, fields_list):
+        res = super().default_get(fields_list)
+        if self.env.context.get('active_model') == 'library.book' and self.env.context.get('active_ids'):
+            res['book_ids'] = [(6, 0, self.env.context['active_ids'])]
+        return res
+
+    def _get_books(self):
+        if self.transfer_mode == 'books':
+            return self.book_ids
+        if not self.source_location_id:
+            raise UserError('Please select the location to transfer books from.')
+        operator = 'child_of' if self.include_sublocations else '='
+        return self.env['library.book'].search([('location_id', operator, self.source_location_id.id)])
+
+    # One batched write for all books, without a tracking message per book;
+    # the transfer is logged once, as a summary on the destination location
+    # Copies shelved with their book move with it; copies kept elsewhere stay where they are
     def action_transfer_book(self):
-        # Implement your transfer logic here
-        if not self.book_id or not self.to_location:
-            raise UserError('Please select a book and destination.')
-        # Example: update book location
-        self.book_id.location = self.to_location
-        return {'type': 'ir.actions.act_window_close'}
\ No newline at end of file
+        self.ensure_one()
+        books = self._get_books().filtered(lambda book: book.location_id != self.location_id)
+        if not books:
+            raise UserError('There are no books to transfer.')
+
+        origins = self.env['library.book']._read_group(
+            [('id', 'in', books.ids)], ['location_id'], ['__count'],
+        )
+        copies = books.with_context(active_test=False).copy_ids.filtered(
+            lambda copy: not copy.location_id or copy.location_id == copy.book_id.location_id)
+        books.with_context(tracking_disable=True).write({'location_id': self.location_id.id})
+        copies.with_context(tracking_disable=True).write({'location_id': self.location_id.id})
+
+        lines = Markup().join(
+            Markup("<li>%s: %s</li>") % (origin.complete_name or 'No location', count)
+            for origin, count in origins
+        )
+        summary = f"{len(books)} books transferred here on {self.transfer_date}"
+        if self.note:
+            summary += f" ({self.note})"
+        self.location_id.message_post(body=Markup("%s:<ul>%s</ul>") % (summary, lines))
+        return {'type': 'ir.actions.act_window_close'}
@@ -1,11 +1,16 @@
 from odoo import models, fields, api
-from odoo.exceptions import UserError
+from odoo.exceptions import UserError, ValidationError
 
 class FinePaymentWizard(models.TransientModel):
     _name = 'fine.payment.wizard'
     _description = 'Fine Payment Wizard'
 
-    fine_id = fields.Many2one('library.fine', 'Fine', required=True)
+    # A payment is taken for a member and allocated to their open fines, oldest first;
+    # with a fine selected, it only goes to that fine
+    member_id = fields.Many2one('library.member', 'Member', required=True,
+                                compute='_compute_member_id', store=True, readonly=False)
+    fine_id = fields.Many2one('library.fine', 'Fine', domain="[('member_id', '=', member_id), ('state', 'in', ('pending', 'partial'))]")
+    outstanding_amount = fields.Float('Outstanding Amount', compute='_compute_outstanding_amount', digits='Product Price')
     payment_amount = fields.Float('Payment Amount', required=True)
     payment_method = fields.Selection([
         ('cash', 'Cash'),
@@ -15,16 +20,26 @@ class FinePaymentWizard(models.TransientModel):
     ], 'Payment Method', required=True)
     payment_reference = fields.Char('Payment Reference')
 
+    @api.depends('fine_id')
+    def _compute_member_id(self):
+        for wizard in self:
+            if wizard.fine_id:
+                wizard.member_id = wizard.fine_id.member_id
+
+    @api.depends('member_id', 'fine_id')
+    def _compute_outstanding_amount(self):
+        for wizard in self:
+            fines = wizard.fine_id or wizard.member_id.fine_ids.filtered(lambda f: f.state in ('pending', 'partial'))
+            wizard.outstanding_amount = sum(fines.mapped('remaining_amount'))
+
     def action_pay_fine(self):
         if self.payment_amount <= 0:
             raise UserError('Payment amount must be positive.')
-        if self.payment_amount > self.fine_id.remaining_amount:
-            raise UserError('Payment exceeds remaining fine amount.')
-        self.fine_id.paid_amount += self.payment_amount
-        self.fine_id.payment_method = self.payment_method
-        self.fine_id.payment_reference = self.payment_reference
-        if self.fine_id.paid_amount >= self.fine_id.amount:
-            self.fine_id.state = 'paid'
-        else:
-            self.fine_id.state = 'partial'
-        return {'type': 'ir.actions.act_window_close'}
\ No newline at end of file
+        try:
+            self.env['library.fine']._allocate_member_payment(
+                self.member_id, self.payment_amount, self.payment_method, self.payment_reference,
+                fine_ids=self.fine_id.ids or None,
+            )
+        except ValidationError as e:
+            raise UserError(str(e))
+        return {'type': 'ir.actions.act_window_close'}
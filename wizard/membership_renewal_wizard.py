@@ -1,26 +1,59 @@
 from odoo import models, fields, api
 from odoo.exceptions import UserError
+from odoo.tools.safe_eval import safe_eval
 
 class MembershipRenewalWizard(models.TransientModel):
     _name = 'membership.renewal.wizard'
     _description = 'Membership Renewal Wizard'
 
-    member_id = fields.Many2one('library.member', 'Member', required=True)
+    # Renews the selected members, or every member matching a filter (e.g. all students at term start)
+    renewal_mode = fields.Selection([
+        ('members', 'Selected Members'),
+        ('domain', 'Members Matching a Filter'),
+    ], 'Renew', default='members', required=True)
+    member_ids = fields.Many2many('library.member', string='Members')
+    member_domain = fields.Char('Members Filter', default="[('membership_type', '=', 'student')]")
+    member_count = fields.Integer('Members to Renew', compute='_compute_member_count')
     renewal_period = fields.Integer('Renewal Period (months)', required=True, default=12)
+    # Preview, shown when a single member is renewed
     new_expiry_date = fields.Date('New Expiry Date', compute='_compute_new_expiry_date')
 
-    @api.depends('member_id', 'renewal_period')
+    @api.model
+    def default_get(self, fields_list):
+        res = super().default_get(fields_list)
+        if self.env.context.get('active_model') == 'library.member' and self.env.context.get('active_ids'):
+            res['member_ids'] = [(6, 0, self.env.context['active_ids'])]
+        return res
+
+    def _get_members(self):
+        if self.renewal_mode == 'members':
+            return self.member_ids
+        return self.env['library.member'].search(safe_eval(self.member_domain or '[]'))
+
+    @api.depends('renewal_mode', 'member_ids', 'member_domain')
+    def _compute_member_count(self):
+        for wizard in self:
+            if wizard.renewal_mode == 'members':
+                wizard.member_count = len(wizard.member_ids)
+            else:
+                wizard.member_count = self.env['library.member'].search_count(safe_eval(wizard.member_domain or '[]'))
+
+    @api.depends('renewal_mode', 'member_ids', 'renewal_period')
     def _compute_new_expiry_date(self):
+        today = fields.Date.today()
         for wizard in self:
-            if wizard.member_id and wizard.renewal_period:
-                wizard.new_expiry_date = fields.Date.add(wizard.member_id.expiry_date or fields.Date.today(), months=wizard.renewal_period)
+            if wizard.renewal_mode == 'members' and len(wizard.member_ids) == 1 and wizard.renewal_period:
+                expiry_date = wizard.member_ids.expiry_date
+                base = expiry_date if expiry_date and expiry_date >= today else today
+                wizard.new_expiry_date = fields.Date.add(base, months=wizard.renewal_period)
             else:
                 wizard.new_expiry_date = False
 
     def action_renew_membership(self):
-        if not self.member_id:
-            raise UserError('Please select a member.')
-        if not self.new_expiry_date:
+        if self.renewal_period <= 0:
             raise UserError('Invalid renewal period.')
-        self.member_id.expiry_date = self.new_expiry_date
-        return {'type': 'ir.actions.act_window_close'}
\ No newline at end of file
+        members = self._get_members()
+        if not members:
+            raise UserError('Please select the members to renew.')
+        members._renew_memberships(self.renewal_period)
+        return {'type': 'ir.actions.act_window_close'}